@@ -1,21 +1,763 @@
 import time
-import math
 import serial
 import struct
+import queue
+import threading
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from functools import lru_cache
+
+
+# Panel processing time model used to pace writes to the T5UIC1
+# Every command costs base + per_unit * units microseconds, where units depends on the command:
+# pixels filled or copied, glyph pixels drawn, set points (0.4 * Nx * Ny uS each per the protocol)...
+# Writes are split and delayed only when the panel would fall more than max_backlog seconds
+# behind the UART, instead of sleeping after every packet.
+#  baudrate: UART speed, for the transmit time of each byte
+#  costs: tuning table overriding entries of COSTS
+#  max_backlog: processing time the panel may have queued up, in seconds
+class DWIN_Pacer:
+	# Command: (base uS, uS per unit), starting values for a stock T5UIC1, see T5UIC1_LCD.Calibrate()
+	COSTS = {
+		0x00: (100.0, 0.0),  # Handshake
+		0x01: (1000.0, 0.02),  # Clear screen, per pixel
+		0x02: (20.0, 0.4),  # Draw points, per point pixel
+		0x03: (20.0, 0.1),  # Draw line, per pixel of the longest axis
+		0x05: (20.0, 0.02),  # Draw rectangle, per pixel filled or outlined
+		0x09: (50.0, 0.04),  # Move area, per pixel moved plus per pixel of the vacated strip
+		0x11: (50.0, 0.02),  # Draw string, per glyph pixel
+		0x14: (50.0, 0.02),  # Draw number, per glyph pixel
+		0x21: (500.0, 0.05),  # QR code, per pixel
+		0x22: (60000.0, 0.0),  # Decode and show a full screen JPG
+		0x23: (300.0, 0.0),  # Show icon
+		0x25: (40000.0, 0.0),  # Decode a JPG into a virtual area
+		0x27: (30.0, 0.02),  # Copy area, per pixel
+		0x28: (50.0, 0.0),  # Icon animation
+		0x30: (50.0, 0.0),  # Backlight
+		0x31: (50.0, 0.5),  # Write SRAM/flash, per byte; flash writes are confirmed with an ACK
+		0x32: (50.0, 0.0),  # Read memory
+		0x33: (1000.0, 0.0),  # SRAM to picture memory, confirmed with an ACK
+		0x34: (1000.0, 0.0),  # Screen direction
+		0x3D: (500.0, 0.0),  # Update display
+	}
+	DEFAULT_COST = (100.0, 0.0)
+
+	def __init__(self, baudrate=115200, costs=None, max_backlog=0.002):
+		self.byte_time = 10.0 / baudrate
+		self.costs = dict(self.COSTS)
+		if costs:
+			self.costs.update(costs)
+		self.max_backlog = max_backlog
+		self.busy_until = 0.0  # When the panel is expected to be done with everything written
+		self.paused = 0.0  # Total time spent waiting for the panel
+		self.sent_until = 0.0  # When the UART is expected to have sent the last byte written
+		self.recorder = None  # DWIN_Recorder logging every frame written
+
+	# Cost units of the frame at buf[start:end]
+	@staticmethod
+	def units(buf, start, end):
+		cmd = buf[start + 1]
+		if cmd == 0x01:
+			return T5UIC1_LCD.DWIN_WIDTH * T5UIC1_LCD.DWIN_HEIGHT
+		if cmd == 0x02:
+			if end - start == 12:
+				return buf[start + 3] * buf[start + 4]
+			return buf[start + 4] * buf[start + 5] * ((end - start - 10) // 4)
+		if cmd == 0x03:
+			xs, ys, xe, ye = struct.unpack_from('>HHHH', buf, end - 12)
+			return max(abs(xe - xs), abs(ye - ys)) + 1
+		if cmd == 0x05:
+			xs, ys, xe, ye = struct.unpack_from('>HHHH', buf, end - 12)
+			w = abs(xe - xs) + 1
+			h = abs(ye - ys) + 1
+			return 2 * (w + h) if buf[start + 2] == 0 else w * h
+		if cmd == 0x09:
+			dir = buf[start + 2] & 0x7F
+			dis = struct.unpack_from('>H', buf, start + 3)[0]
+			xs, ys, xe, ye = struct.unpack_from('>HHHH', buf, end - 12)
+			w = abs(xe - xs) + 1
+			h = abs(ye - ys) + 1
+			return w * h + dis * (h if dir < 2 else w)
+		if cmd == 0x11 or cmd == 0x14:
+			fw, fh = T5UIC1_LCD.DWIN_FONT_SIZES[min(buf[start + 2] & 0x0F, 9)]
+			if cmd == 0x11:
+				n = end - start - 15
+			else:
+				n = buf[start + 7] + buf[start + 8] + 1
+			return n * fw * fh
+		if cmd == 0x21:
+			return (46 * buf[start + 6]) ** 2
+		if cmd == 0x27:
+			_, _, xs, ys, xe, ye, _, _ = T5UIC1_LCD.DWIN_Packet[0x27].unpack_from(buf, start + 1)
+			return (abs(xe - xs) + 1) * (abs(ye - ys) + 1)
+		if cmd == 0x31:
+			return end - start - 9
+		return 1
+
+	# Estimated panel processing time of a frame, in seconds
+	def cost(self, buf, start, end):
+		base, per_unit = self.costs.get(buf[start + 1], self.DEFAULT_COST)
+		if per_unit:
+			return (base + per_unit * self.units(buf, start, end)) * 1e-6
+		return base * 1e-6
+
+	# Write data holding whole frames
+	#  write: function writing bytes to the UART
+	#  starts: start offset of each frame in data
+	def write(self, write, data, starts):
+		now = time.monotonic()
+		busy = max(self.busy_until, now)
+		clock = now  # When the UART will have sent everything written so far
+		sent = []  # When the UART will have sent each frame, for the log
+		chunk = 0
+		first = 0  # First frame of the chunk
+		n = len(starts)
+		for i in range(n):
+			start = starts[i]
+			end = starts[i + 1] if i + 1 < n else len(data)
+			tx = (end - start) * self.byte_time
+			# Hold the frame back while the panel would still be busy with earlier ones when it arrives
+			ready = busy - self.max_backlog - tx
+			if ready > clock:
+				if start > chunk:
+					with memoryview(data)[chunk:start] as part:
+						write(part)
+					if self.recorder:
+						self.recorder.record(data, starts[first:i], start, sent[first:i])
+					chunk = start
+					first = i
+				wait = ready - time.monotonic()
+				if wait > 0:
+					time.sleep(wait)
+					self.paused += wait
+				clock = ready
+			clock += tx
+			sent.append(clock)
+			busy = max(busy, clock) + self.cost(data, start, end)
+		if chunk < len(data):
+			with memoryview(data)[chunk:] as part:
+				write(part)
+			if self.recorder:
+				self.recorder.record(data, starts[first:], len(data), sent[first:])
+		self.busy_until = busy
+		self.sent_until = clock
+
+
+# Binary log of the framed packets written to the panel
+# The file starts with MAGIC, followed by one RECORD (monotonic time in ns, frame length)
+# and the frame bytes, header and tail included, per packet.
+# The time is when the last byte of the frame is expected to leave the UART, from the pacer's
+# transmit clock, so the frames of one write each get their own time.
+#  path: log file to create
+class DWIN_Recorder:
+	MAGIC = b'DWINLOG1'
+	RECORD = struct.Struct('<QH')
+
+	def __init__(self, path):
+		self.path = path
+		self.file = open(path, 'wb')
+		self.file.write(self.MAGIC)
+		self.lock = threading.Lock()
+		self.frames = 0
+
+	# Log the frames of data starting at the given offsets, the last one ending at end
+	#  times: time.monotonic() each frame went out, now for all of them by default
+	def record(self, data, starts, end, times=None):
+		now = time.monotonic_ns()
+		n = len(starts)
+		with self.lock:
+			if self.file is None:
+				return
+			for i in range(n):
+				start = starts[i]
+				stop = starts[i + 1] if i + 1 < n else end
+				t = now if times is None else int(times[i] * 1e9)
+				self.file.write(self.RECORD.pack(t, stop - start))
+				self.file.write(data[start:stop])
+			self.frames += n
+
+	def close(self):
+		with self.lock:
+			if self.file is not None:
+				self.file.close()
+				self.file = None
+
+	# Read back a log, yields (monotonic time in ns, frame) per packet
+	@classmethod
+	def read(cls, path):
+		with open(path, 'rb') as f:
+			if f.read(len(cls.MAGIC)) != cls.MAGIC:
+				raise ValueError("%s is not a DWIN traffic log" % path)
+			while True:
+				head = f.read(cls.RECORD.size)
+				if len(head) < cls.RECORD.size:
+					return
+				t, length = cls.RECORD.unpack(head)
+				frame = f.read(length)
+				if len(frame) < length:
+					return
+				yield t, frame
+
+
+# Serial writer thread for T5UIC1_LCD
+# Frames are queued by the drawing threads and written by a dedicated thread,
+# so a slow UART never blocks encoder handling or the update timer.
+#  port: open serial port
+#  queue_size: maximum number of queued writes
+#  full_policy: 'block' waits for room in the queue, 'drop' discards the oldest queued write
+#  coalesce: join everything queued into a single write
+#  pacer: DWIN_Pacer spacing the frames for the panel
+#  on_drop: called with (data, starts) of each write the 'drop' policy discards
+class DWIN_Writer:
+	def __init__(self, port, queue_size=64, full_policy='block', coalesce=True, pacer=None, on_drop=None):
+		if full_policy not in ('block', 'drop'):
+			raise ValueError("full_policy must be 'block' or 'drop'")
+		self.port = port
+		self.queue = queue.Queue(queue_size)
+		self.full_policy = full_policy
+		self.coalesce = coalesce
+		self.pacer = pacer or DWIN_Pacer(port.baudrate)
+		self.on_drop = on_drop
+		self.closed = False  # Writes after close() are dropped
+		self.lock = threading.Lock()
+		self.frames = 0
+		self.bytes = 0
+		self.writes = 0  # UART writes, coalesced queued writes count once
+		self.queued = 0  # Writes taken off the queue, each with its own drain time
+		self.dropped = 0
+		self.max_depth = 0
+		self.drain_time = 0.0
+		self.max_drain_time = 0.0
+		self.thread = threading.Thread(target=self.run, name='DWIN_Writer', daemon=True)
+		self.thread.start()
+
+	# Queue a copy of data for writing
+	#  starts: start offset of each frame in data
+	#  done: called with the time the last byte left the UART, or with None if the write is dropped
+	def write(self, data, starts=(0,), done=None):
+		if self.closed:
+			self.reject(done)
+			return
+		item = (bytes(data), time.monotonic(), tuple(starts), done)
+		if self.full_policy == 'block':
+			self.queue.put(item)
+		else:
+			while True:
+				try:
+					self.queue.put_nowait(item)
+					break
+				except queue.Full:
+					try:
+						old = self.queue.get_nowait()
+					except queue.Empty:
+						continue
+					self.queue.task_done()
+					if old is None:
+						# close() got in first: its end marker stays last and this write is not made
+						self.queue.put_nowait(None)
+						self.reject(done)
+						return
+					if self.on_drop is not None:
+						self.on_drop(old[0], old[2])
+					if old[3] is not None:
+						old[3](None)
+					with self.lock:
+						self.dropped += 1
+		depth = self.queue.qsize()
+		if depth > self.max_depth:
+			self.max_depth = depth
+
+	def run(self):
+		while True:
+			item = self.queue.get()
+			if item is None:
+				self.queue.task_done()
+				break
+			items = [item]
+			if self.coalesce:
+				while True:
+					try:
+						item = self.queue.get_nowait()
+					except queue.Empty:
+						break
+					if item is None:
+						self.queue.put(None)
+						self.queue.task_done()
+						break
+					items.append(item)
+			if len(items) == 1:
+				data, _, starts, _ = items[0]
+			else:
+				data = b''.join(i[0] for i in items)
+				starts = []
+				offset = 0
+				for i in items:
+					starts.extend(offset + start for start in i[2])
+					offset += len(i[0])
+			self.pacer.write(self.port.write, data, starts)
+			self.port.flush()  # Wait until the last byte left the UART
+			done = time.monotonic()
+			with self.lock:
+				self.writes += 1
+				self.frames += len(starts)
+				self.bytes += len(data)
+				self.queued += len(items)
+				for i in items:
+					drain = done - i[1]
+					self.drain_time += drain
+					if drain > self.max_drain_time:
+						self.max_drain_time = drain
+			for i in items:
+				if i[3] is not None:
+					i[3](done)
+				self.queue.task_done()
+
+	# Block until everything queued so far has been written
+	def wait(self):
+		self.queue.join()
+
+	# Write what is queued and stop the thread
+	def close(self):
+		if self.closed:
+			return
+		self.closed = True
+		self.queue.put(None)
+		self.thread.join()
+
+	def reject(self, done):
+		with self.lock:
+			self.dropped += 1
+		if done is not None:
+			done(None)
+
+	# Counters for watching UART saturation
+	def stats(self):
+		with self.lock:
+			return {
+				'queue_depth': self.queue.qsize(),
+				'max_queue_depth': self.max_depth,
+				'writes': self.writes,
+				'frames': self.frames,
+				'bytes': self.bytes,
+				'dropped': self.dropped,
+				'avg_drain_time': self.drain_time / self.queued if self.queued else 0.0,
+				'max_drain_time': self.max_drain_time,
+				'paced_time': self.pacer.paused,
+			}
+
+
+# Take the complete frames off the front of a receive buffer
+#  rx: bytearray of received bytes, consumed in place
+# Returns the payloads between the 0xAA header and the CC 33 C3 3C tail
+def split_frames(rx):
+	payloads = []
+	while True:
+		start = rx.find(T5UIC1_LCD.FHONE)
+		if start < 0:
+			rx.clear()
+			break
+		end = rx.find(T5UIC1_LCD.DWIN_BufTail, start + 1)
+		if end < 0:
+			del rx[:start]
+			break
+		payloads.append(bytes(rx[start + 1:end]))
+		del rx[:end + len(T5UIC1_LCD.DWIN_BufTail)]
+	return payloads
+
+
+# Outline of a circle of radius r around (0, 0), midpoint algorithm in integers
+# Returns the (dx, dy) offsets, each pixel once
+@lru_cache(maxsize=64)
+def circle_offsets(r):
+	points = set()
+	x = r
+	y = 0
+	err = 1 - r
+	while x >= y:
+		points.update((
+			(x, y), (y, x), (-y, x), (-x, y),
+			(-x, -y), (-y, -x), (y, -x), (x, -y),
+		))
+		y += 1
+		if err < 0:
+			err += 2 * y + 1
+		else:
+			x -= 1
+			err += 2 * (y - x) + 1
+	return tuple(sorted(points))
+
+
+# Filled circle of radius r around (0, 0) as horizontal spans matching circle_offsets(r)
+# Rows of the same width are merged, so there are O(r) spans (47 for r = 40).
+# Returns (dyStart, dyEnd, half width) tuples, top to bottom
+@lru_cache(maxsize=64)
+def circle_spans(r):
+	widths = {}
+	for dx, dy in circle_offsets(r):
+		if dx > widths.get(dy, -1):
+			widths[dy] = dx
+	spans = []
+	for dy in range(-r, r + 1):
+		w = widths[dy]
+		if spans and spans[-1][2] == w:
+			spans[-1][1] = dy
+		else:
+			spans.append([dy, dy, w])
+	return tuple(tuple(span) for span in spans)
+
+
+# Response received from the panel
+#  kind: 'handshake', 'memory' (0x32 read back), 'ack' (A5 4F 4B flash write done) or 'unknown'
+#  cmd: command byte the response starts with
+#  address: memory address of a 'memory' response
+#  data: payload, after the address for 'memory' responses
+DWIN_Response = namedtuple('DWIN_Response', 'kind cmd address data')
+
+
+# Commands drawing a bitmap, see T5UIC1_LCD.Bitmap_Plan()
+#  commands: dwinGeometry commands
+#  packets, bytes: UART cost
+#  seconds: estimated transfer time
+DWIN_Blit = namedtuple('DWIN_Blit', 'commands packets bytes seconds')
+
+
+# Serial reader thread for T5UIC1_LCD
+# Parses the panel responses and hands them to the futures waiting for them, in order,
+# then to the subscribed callbacks. Responses nobody waited for are kept for Read().
+#  port: open serial port, its timeout bounds how long close() takes
+class DWIN_Reader:
+	ACK = b'\xA5OK'
+
+	def __init__(self, port):
+		self.port = port
+		self.lock = threading.Lock()
+		self.waiting = {}  # kind: deque of futures
+		self.callbacks = []
+		self.unclaimed = queue.Queue(64)
+		self.responses = 0
+		self.garbage = 0  # Payloads that could not be parsed
+		self.running = True
+		self.discard = False
+		self.thread = threading.Thread(target=self.run, name='DWIN_Reader', daemon=True)
+		self.thread.start()
+
+	@classmethod
+	def parse(cls, payload):
+		cmd = payload[0]
+		if payload == b'\x00OK':
+			return DWIN_Response('handshake', cmd, None, payload[1:])
+		if payload.startswith(cls.ACK):
+			return DWIN_Response('ack', cmd, None, payload[len(cls.ACK):])
+		if cmd == 0x32 and len(payload) >= 5:
+			# 0x32, memory type, address, length, data
+			return DWIN_Response('memory', cmd, struct.unpack_from('>H', payload, 2)[0], payload[5:5 + payload[4]])
+		return DWIN_Response('unknown', cmd, None, payload[1:])
+
+	# Future resolved with the next response of this kind
+	# Register before sending the command, so a fast reply is not missed
+	def expect(self, kind):
+		future = Future()
+		with self.lock:
+			self.waiting.setdefault(kind, deque()).append(future)
+		return future
+
+	# Call callback(response) for every response received
+	def subscribe(self, callback):
+		with self.lock:
+			self.callbacks.append(callback)
+
+	def unsubscribe(self, callback):
+		with self.lock:
+			self.callbacks.remove(callback)
+
+	# Drop pending input: the UART buffer, a partly received frame and unclaimed responses
+	def flush(self):
+		self.discard = True
+		self.port.reset_input_buffer()
+		while self.read(0) is not None:
+			pass
+
+	# Next response nobody waited for, None after timeout seconds
+	def read(self, timeout=None):
+		try:
+			return self.unclaimed.get(timeout is None or timeout > 0, timeout)
+		except queue.Empty:
+			return None
+
+	def run(self):
+		rx = bytearray()
+		while self.running:
+			try:
+				data = self.port.read(self.port.in_waiting or 1)
+			except (serial.SerialException, OSError, TypeError):
+				if not self.running:
+					break
+				time.sleep(0.1)
+				continue
+			if self.discard:
+				self.discard = False
+				rx.clear()
+			if not data:
+				continue
+			rx += data
+			for payload in split_frames(rx):
+				if payload:
+					self.dispatch(self.parse(payload))
+				else:
+					self.garbage += 1
+
+	def dispatch(self, response):
+		with self.lock:
+			self.responses += 1
+			futures = self.waiting.get(response.kind)
+			callbacks = list(self.callbacks)
+			claimed = False
+			while futures and not claimed:
+				future = futures.popleft()
+				if future.set_running_or_notify_cancel():  # Skip the ones that timed out
+					future.set_result(response)
+					claimed = True
+		for callback in callbacks:
+			callback(response)
+			claimed = True
+		if not claimed:
+			try:
+				self.unclaimed.put_nowait(response)
+			except queue.Full:
+				self.unclaimed.get_nowait()
+				self.unclaimed.put_nowait(response)
+
+	def close(self):
+		self.running = False
+		self.thread.join()
+
+
+# Screen area drawn by a framed packet
+#  buf: buffer holding the frame
+#  start/end: frame position in buf, header and tail included
+# Returns (xStart, yStart, xEnd, yEnd) with inclusive ends, or None when the area is not known
+def frame_bounds(buf, start, end):
+	cmd = buf[start + 1]
+	fields = start + 1
+	W = T5UIC1_LCD.DWIN_WIDTH
+	H = T5UIC1_LCD.DWIN_HEIGHT
+	if cmd == 0x01 or cmd == 0x22:  # Clear screen, full screen JPG
+		return (0, 0, W - 1, H - 1)
+	if cmd == 0x03 or cmd == 0x05 or cmd == 0x09:
+		xs, ys, xe, ye = struct.unpack_from('>HHHH', buf, end - 12)
+		return (min(xs, xe), min(ys, ye), max(xs, xe), max(ys, ye))
+	if cmd == 0x02:
+		if end - start == 12:  # Draw_Point: width, height, x, y
+			_, nx, ny, x, y = T5UIC1_LCD.DWIN_PointPacket.unpack_from(buf, fields)
+			return (x, y, x + nx - 1, y + ny - 1)
+		_, _, nx, ny = T5UIC1_LCD.DWIN_Packet[0x02].unpack_from(buf, fields)
+		xs = ys = 0xFFFF
+		xe = ye = 0
+		for i in range(fields + 5, end - 4, 4):
+			x, y = struct.unpack_from('>HH', buf, i)
+			xs = min(xs, x)
+			ys = min(ys, y)
+			xe = max(xe, x)
+			ye = max(ye, y)
+		return (xs, ys, xe + nx - 1, ye + ny - 1)
+	if cmd == 0x11:
+		_, flags, _, _, x, y = T5UIC1_LCD.DWIN_Packet[0x11].unpack_from(buf, fields)
+		w, h = T5UIC1_LCD.DWIN_FONT_SIZES[min(flags & 0x0F, 9)]
+		# Byte count is an upper bound of the character count, exact for ASCII
+		n = end - 4 - (fields + T5UIC1_LCD.DWIN_Packet[0x11].size)
+		return (x, y, x + n * w - 1, y + h - 1)
+	if cmd == 0x14:
+		_, flags, _, _, iNum, fNum, x, y = struct.unpack_from('>BBHHBBHH', buf, fields)
+		w, h = T5UIC1_LCD.DWIN_FONT_SIZES[min(flags & 0x0F, 9)]
+		n = iNum + fNum + (1 if fNum else 0)
+		if flags & 0x40:  # Signed: leave room for the sign on both sides
+			return (max(0, x - w), y, x + (n + 1) * w - 1, y + h - 1)
+		return (x, y, x + n * w - 1, y + h - 1)
+	if cmd == 0x23:
+		_, x, y, lib, pic = T5UIC1_LCD.DWIN_Packet[0x23].unpack_from(buf, fields)
+		size = T5UIC1_LCD.DWIN_ICON_SIZES.get((lib & 0x7F, pic))
+		if size is None:  # Icons draw right and down from their point, at most to the screen corner
+			return (x, y, W - 1, H - 1)
+		return (x, y, x + size[0] - 1, y + size[1] - 1)
+	if cmd == 0x21:
+		_, xs, ys, pixel = T5UIC1_LCD.DWIN_Packet[0x21].unpack_from(buf, fields)
+		return (xs, ys, xs + 46 * pixel - 1, ys + 46 * pixel - 1)
+	if cmd == 0x27:
+		_, _, xs, ys, xe, ye, x, y = T5UIC1_LCD.DWIN_Packet[0x27].unpack_from(buf, fields)
+		return (x, y, x + xe - xs, y + ye - ys)
+	return None
+
+
+# Peephole optimizer for a batch of framed packets
+# Drops packets whose output is completely covered by a later opaque fill, area copy
+# or full screen clear before the next flush, and keeps only the latest of repeated
+# numbers/strings drawn at the same position.
+# Commands that read back the screen (area move, XOR fill) or change the display state
+# end the look-behind window, so the result on the panel is unchanged.
+class DWIN_Optimizer:
+	# Commands the panel draws on screen
+	DRAWING = frozenset((0x01, 0x02, 0x03, 0x05, 0x11, 0x14, 0x21, 0x23, 0x27))
+	# Commands that read the screen or change how it is shown
+	BARRIERS = frozenset((0x09, 0x28, 0x34, 0x3D))
+	MAX_COVERS = 32
+
+	def __init__(self):
+		self.last_saved = 0  # Bytes saved by the last flush
+		self.total_saved = 0
+		self.dropped = 0
+		self.flushes = 0
+
+	# Remove overdrawn frames from buf in place
+	#  starts: start offset of every frame in buf, updated to the frames left
+	#  length: used length of buf
+	# Returns the new used length of buf
+	def optimize(self, buf, starts, length):
+		n = len(starts)
+		keep = [True] * n
+		covers = []
+		full = False
+		latest = {}
+		for i in range(n - 1, -1, -1):
+			start = starts[i]
+			end = starts[i + 1] if i + 1 < n else length
+			cmd = buf[start + 1]
+			if cmd in self.BARRIERS or cmd not in self.DRAWING and cmd not in (0x00, 0x22, 0x25, 0x30):
+				covers.clear()
+				latest.clear()
+				full = False
+				continue
+			if cmd == 0x05 and buf[start + 2] == 2:  # XOR fill reads the screen
+				covers.clear()
+				latest.clear()
+				full = False
+				continue
+			if cmd not in self.DRAWING:
+				if cmd == 0x22:
+					full = True
+				continue
+			if full:
+				keep[i] = False
+				continue
+			bounds = frame_bounds(buf, start, end)
+			if bounds and self.covered(covers, bounds):
+				keep[i] = False
+				continue
+			if cmd == 0x11 or cmd == 0x14:
+				# Same command, flags and position
+				key = bytes(buf[start + 1:start + 3]) + bytes(buf[start + 7:start + (11 if cmd == 0x11 else 13)])
+				later = latest.get(key)
+				if later:
+					if later[0] == buf[start:end] or later[1] and bounds and self.covered((later[2],), bounds):
+						keep[i] = False
+						continue
+				else:
+					flags = buf[start + 2]
+					if cmd == 0x11:
+						# Proportional width can't be compared, and the bounds of multibyte text are an upper
+						# bound: it draws fewer cells than it has bytes, so only ASCII text covers its bounds
+						text = buf[start + 1 + T5UIC1_LCD.DWIN_Packet[0x11].size:end - 4]
+						opaque = bool(flags & 0x40) and not flags & 0x80 and text.isascii()
+					else:
+						opaque = bool(flags & 0x80)
+					latest[key] = (bytes(buf[start:end]), opaque, bounds)
+			if cmd == 0x01:
+				full = True
+			elif cmd == 0x05 and buf[start + 2] == 1 or cmd == 0x27:
+				if len(covers) < self.MAX_COVERS:
+					covers.append(bounds)
+		saved = 0
+		pos = 0
+		kept = []
+		for i in range(n):
+			start = starts[i]
+			end = starts[i + 1] if i + 1 < n else length
+			if keep[i]:
+				kept.append(pos)
+				if pos != start:
+					buf[pos:pos + end - start] = buf[start:end]
+				pos += end - start
+			else:
+				saved += end - start
+				self.dropped += 1
+		starts[:] = kept
+		self.last_saved = saved
+		self.total_saved += saved
+		self.flushes += 1
+		return pos
+
+	@staticmethod
+	def covered(covers, bounds):
+		xs, ys, xe, ye = bounds
+		for c in covers:
+			if c[0] <= xs and c[1] <= ys and xe <= c[2] and ye <= c[3]:
+				return True
+		return False
+
+	def stats(self):
+		return {
+			'last_saved': self.last_saved,
+			'total_saved': self.total_saved,
+			'dropped': self.dropped,
+			'flushes': self.flushes,
+		}
+
+
+# Packet buffer of one drawing thread, the frame header followed by the packet being built
+class DWIN_SendBuffer(threading.local):
+	def __init__(self, size, header):
+		self.buf = bytearray(size)
+		self.buf[0:len(header)] = header
+		self.len = len(header)
 
 
 class T5UIC1_LCD:
 	address = 0x2A
-	DWIN_BufTail = [0xCC, 0x33, 0xC3, 0x3C]
-	DWIN_SendBuf = []
-	databuf = [None] * 26
-	recnum = 0
-
+	DWIN_BufTail = b'\xCC\x33\xC3\x3C'
+	DWIN_BufSize = 256  # Initial size of the reusable frame buffer, grows for long strings
 	RECEIVED_NO_DATA = 0x00
 	RECEIVED_SHAKE_HAND_ACK = 0x01
 
 	FHONE = b'\xAA'
 
+	# Packet layouts: command byte followed by the fixed fields of the command.
+	# The frame header is kept at offset 0 of the send buffer, so layouts start at offset 1.
+	_Byte = struct.Struct('>B')
+	_Word = struct.Struct('>H')
+	_Long = struct.Struct('>L')
+	_D64 = struct.Struct('>Q')
+	_Point = struct.Struct('>HH')
+	DWIN_Packet = {
+		0x00: struct.Struct('>B'),  # Handshake
+		0x01: struct.Struct('>BH'),  # Clear screen: color
+		0x02: struct.Struct('>BHBB'),  # Draw points: color, Nx, Ny, followed by (X, Y) words
+		0x03: struct.Struct('>BHHHHH'),  # Draw line: color, xStart, yStart, xEnd, yEnd
+		0x05: struct.Struct('>BBHHHHH'),  # Draw rectangle: mode, color, xStart, yStart, xEnd, yEnd
+		0x09: struct.Struct('>BBHHHHHH'),  # Move area: mode|dir, dis, color, xStart, yStart, xEnd, yEnd
+		0x11: struct.Struct('>BBHHHH'),  # Draw string: flags, color, bColor, x, y, followed by the string
+		0x14: struct.Struct('>BBHHBBHHQ'),  # Draw integer: flags, color, bColor, iNum, fNum, x, y, value
+		0x21: struct.Struct('>BHHB'),  # QR code: Xs, Ys, pixel size, followed by the data
+		0x22: struct.Struct('>BBB'),  # Show and cache JPG: 0x00, id
+		0x23: struct.Struct('>BHHBB'),  # Show icon: x, y, 0x80|libID, picID
+		0x25: struct.Struct('>BBB'),  # Cache JPG to N: n, id
+		0x27: struct.Struct('>BBHHHHHH'),  # Copy area: 0x80|cacheID, xStart, yStart, xEnd, yEnd, x, y
+		0x28: struct.Struct('>BHHBBBBB'),  # Icon animation: x, y, flags, libID, picIDs, picIDe, interval
+		0x30: struct.Struct('>BB'),  # Backlight: luminance
+		0x31: struct.Struct('>BBH'),  # Write memory: type, address, followed by the data
+		0x32: struct.Struct('>BBHB'),  # Read memory: type, address, length
+		0x33: struct.Struct('>BBBB'),  # SRAM to picture memory: 0x5A, 0xA5, picID
+		0x34: struct.Struct('>BBBB'),  # Screen direction: 0x5A, 0xA5, dir
+		0x3D: struct.Struct('>B'),  # Update display
+	}
+	# Floating point numbers share command 0x14 but carry a 32 bit value
+	DWIN_FloatPacket = struct.Struct('>BBHHBBHHL')
+	# Signed numbers (bit 6 of the mode) carry a two's complement 32 bit value
+	DWIN_SignedPacket = struct.Struct('>BBHHBBHHl')
+	# Icon animation control shares command 0x28 with a single state word
+	DWIN_AnimationControlPacket = struct.Struct('>BH')
+	# Draw a single pixel point: width, height, x, y
+	DWIN_PointPacket = struct.Struct('>BBBHH')
+
 	DWIN_WIDTH = 272
 	DWIN_HEIGHT = 480
 
@@ -33,6 +775,13 @@ class T5UIC1_LCD:
 	font24x48 = 0x07
 	font28x56 = 0x08
 	font32x64 = 0x09
+	# Character cell (width, height) of each font size
+	DWIN_FONT_SIZES = (
+		(6, 12), (8, 16), (10, 20), (12, 24), (14, 28),
+		(16, 32), (20, 40), (24, 48), (28, 56), (32, 64)
+	)
+	# (width, height) of the icons by (libID, picID), see SetIconSizes()
+	DWIN_ICON_SIZES = {}
 
 	# Color
 	Color_White = 0xFFFF
@@ -55,103 +804,547 @@ class T5UIC1_LCD:
 	# Dwen serial screen initialization
 	# Passing parameters: serial port number
 	# DWIN screen uses serial port 1 to send
-	def __init__(self, USARTx):
+	#  async_write: write from a background DWIN_Writer thread instead of the calling thread
+	#  queue_size, full_policy, coalesce: DWIN_Writer settings
+	#  low_latency: ask the tty driver for low latency mode (Linux only)
+	#  optimize: drop overdrawn packets from batches before they are written
+	#  cache_size: number of encoded static packets (labels, icons, strings) to keep, 0 disables the cache
+	#  pacing: DWIN_Pacer cost table overrides, {command: (base uS, uS per unit)}
+	#  record: log every packet written to this file, see Record()
+	#  handshake_timeout: seconds to look for the panel, then carry on without it until it answers
+	#  on_attach: called with the screen when a panel that was missing answers
+	def __init__(
+		self, USARTx, async_write=False, queue_size=64, full_policy='block', coalesce=True, low_latency=False,
+		optimize=True, cache_size=256, pacing=None, record=None, handshake_timeout=5.0, on_attach=None
+	):
 		self.MYSERIAL1 = serial.Serial(USARTx, 115200, timeout=1)
+		self.pacer = DWIN_Pacer(115200, pacing)
+		if record:
+			self.Record(record)
+		if low_latency:
+			try:
+				self.MYSERIAL1.set_low_latency_mode(True)
+			except (AttributeError, NotImplementedError, ValueError, IOError) as e:
+				print("DWIN low latency mode not available:", e)
+		self.writer = None
+		if async_write:
+			self.writer = DWIN_Writer(self.MYSERIAL1, queue_size, full_policy, coalesce, self.pacer, self.WriteDropped)
 		# self.bus = SMBus(1)
-		# self.DWIN_SendBuf = self.FHONE
+		# Every packet is built in place in a buffer of the drawing thread, behind the frame header,
+		# so threads never mix their fields; Send() takes the screen lock to hand the frame on
+		self.DWIN_Send = DWIN_SendBuffer(self.DWIN_BufSize, self.FHONE)
+		# Framed packets waiting for the next flush while a batch is open
+		self.DWIN_BatchBuf = bytearray(self.DWIN_BufSize)
+		self.DWIN_BatchLen = 0
+		self.DWIN_BatchFrames = []  # Start offset of each queued packet
+		self.DWIN_BatchDepth = 0
+		self.optimizer = DWIN_Optimizer() if optimize else None
+		# Encoded frames by command and arguments, least recently used first
+		self.DWIN_PacketCache = OrderedDict()
+		self.DWIN_CacheSize = cache_size
+		self.cache_hits = 0
+		self.cache_misses = 0
+		# Retained display list: key: (rect, frames, area) of every region last drawn
+		self.DWIN_Regions = {}
+		self.DWIN_Region = None  # Frames collected by the open region
+		self.region_skipped = 0  # Frames the display list kept off the UART
+		self.DWIN_Fields = {}  # NumericField() objects by format and position
+		self.DWIN_Lock = threading.RLock()
+		self.DWIN_MemoryLock = threading.RLock()  # Keeps uploads through the SRAM apart, drawing goes on
+		self.reader = DWIN_Reader(self.MYSERIAL1)
+		# Without a panel everything but handshakes is dropped, see WatchForPanel()
+		self.present = False
+		self.absent_dropped = 0
+		self.tracer = None  # dwinTrace.DWIN_Tracer timing the writes of the input event being handled
+		self.on_attach = on_attach
+		self.prober = None
 		print("\nDWIN handshake ")
-		while not self.Handshake():
+		if self.Connect(handshake_timeout):
+			print("DWIN OK.")
+			self.Setup()
+		else:
+			print("DWIN panel not found, running without it")
+			self.WatchForPanel()
+
+	# Start screen shown once the panel answers
+	def Setup(self):
+		with self.Batch():
+			self.JPG_ShowAndCache(0)
+			self.Frame_SetDir(1)
+			self.UpdateLCD()
+
+	# Handshake until the panel answers or timeout seconds went by
+	# The input is flushed before every attempt and the pause between attempts doubles up to max_backoff.
+	# Returns True when the panel is present
+	def Connect(self, timeout=5.0, backoff=0.05, max_backoff=1.0):
+		deadline = time.monotonic() + timeout
+		delay = backoff
+		while True:
+			self.reader.flush()
+			if self.Handshake(min(0.5, max(deadline - time.monotonic(), 0.05))):
+				with self.DWIN_Lock:
+					if not self.present:
+						# Nothing drawn while it was missing reached the panel
+						self.Invalidate()
+					self.present = True
+				return True
+			wait = min(delay, deadline - time.monotonic())
+			if wait <= 0:
+				self.present = False
+				return False
+			time.sleep(wait)
+			delay = min(delay * 2, max_backoff)
+
+	# Keep looking for a missing panel from a background thread, attach it when it answers
+	#  max_backoff: longest pause between handshakes, in seconds
+	def WatchForPanel(self, max_backoff=5.0):
+		if self.prober and self.prober.is_alive():
+			return
+		self.prober = threading.Thread(target=self.Probe, args=(max_backoff,), name='DWIN_Prober', daemon=True)
+		self.prober.start()
+
+	def Probe(self, max_backoff):
+		while not self.Connect(60.0, 0.5, max_backoff):
 			pass
-		print("DWIN OK.")
-		self.JPG_ShowAndCache(0)
-		self.Frame_SetDir(1)
-		self.UpdateLCD()
+		print("DWIN panel attached.")
+		self.Setup()
+		if self.on_attach:
+			self.on_attach(self)
+
+	# Write the fixed fields of a packet into the send buffer
+	#  fmt: struct layout of the fields
+	#  fields: values, truncated to integers like the panel expects
+	def Pack(self, fmt, *fields):
+		send = self.DWIN_Send
+		end = send.len + fmt.size
+		if end > len(send.buf):
+			send.buf.extend(bytes(end - len(send.buf)))
+		fmt.pack_into(send.buf, send.len, *map(int, fields))
+		send.len = end
+
+	# Append raw bytes to the send buffer, growing it when needed
+	def Bytes(self, data):
+		send = self.DWIN_Send
+		end = send.len + len(data)
+		send.buf[send.len:end] = data
+		send.len = end
 
 	def Byte(self, bval):
-		self.DWIN_SendBuf += int(bval).to_bytes(1, byteorder='big')
+		self.Pack(self._Byte, bval)
 
 	def Word(self, wval):
-		self.DWIN_SendBuf += int(wval).to_bytes(2, byteorder='big')
+		self.Pack(self._Word, wval)
 
 	def Long(self, lval):
-		self.DWIN_SendBuf += int(lval).to_bytes(4, byteorder='big')
+		self.Pack(self._Long, lval)
 
 	def D64(self, value):
-		self.DWIN_SendBuf += int(value).to_bytes(8, byteorder='big')
+		self.Pack(self._D64, value)
 
 	def String(self, string):
-		self.DWIN_SendBuf += string.encode('utf-8')
+		self.Bytes(string.encode('utf-8'))
 
 	# Send the data in the buffer and the packet end
-	def Send(self):
-		# for i in self.DWIN_BufTail:
-		# 	self.Byte(i)
+	#  key: remember the framed packet in the packet cache under this key
+	def Send(self, key=None):
 		# self.bus.write_i2c_block_data(self.address, 0, self.DWIN_SendBuf)
 		# self.bus.write_i2c_block_data(self.address, 0, self.DWIN_BufTail)
+		self.Bytes(self.DWIN_BufTail)
+		send = self.DWIN_Send
+		with memoryview(send.buf)[:send.len] as frame, self.DWIN_Lock:
+			if key is not None and self.DWIN_CacheSize:
+				self.DWIN_PacketCache[key] = bytes(frame)
+				if len(self.DWIN_PacketCache) > self.DWIN_CacheSize:
+					self.DWIN_PacketCache.popitem(last=False)
+			self.SendFrame(frame)
+		send.len = 1
 
-		self.MYSERIAL1.write(self.DWIN_SendBuf)
-		self.MYSERIAL1.write(self.DWIN_BufTail)
+	# Send a complete frame, header and tail included
+	# Inside a region the frame is collected for diffing, inside a batch it is queued until the next flush
+	def SendFrame(self, frame):
+		if self.DWIN_Region is not None:
+			self.DWIN_Region.append(bytes(frame))
+			return
+		if self.DWIN_Regions:
+			self.Damage(frame)
+		self.QueueFrame(frame)
 
-		self.DWIN_SendBuf = self.FHONE
-		time.sleep(0.001)
+	def QueueFrame(self, frame):
+		if self.DWIN_BatchDepth:
+			end = self.DWIN_BatchLen + len(frame)
+			self.DWIN_BatchFrames.append(self.DWIN_BatchLen)
+			self.DWIN_BatchBuf[self.DWIN_BatchLen:end] = frame
+			self.DWIN_BatchLen = end
+		else:
+			self.Write(frame)
 
-	def Read(self, lend=1):
-		bit = self.bus.read_i2c_block_data(self.address, 0, lend)
-		if lend == 1:
-			return bytes(bit)
-		return bit
+	# Send the cached frame for key
+	# Returns False when the packet still has to be encoded
+	def SendCached(self, key):
+		with self.DWIN_Lock:
+			frame = self.DWIN_PacketCache.get(key)
+			if frame is None:
+				self.cache_misses += 1
+				return False
+			self.DWIN_PacketCache.move_to_end(key)
+			self.cache_hits += 1
+			self.SendFrame(frame)
+		return True
 
-	# /*-------------------------------------- System variable function --------------------------------------*/
+	# Hit/miss counters of the packet cache
+	def CacheStats(self):
+		return {
+			'hits': self.cache_hits,
+			'misses': self.cache_misses,
+			'size': len(self.DWIN_PacketCache),
+			'capacity': self.DWIN_CacheSize,
+		}
 
-	# Handshake (1: Success, 0: Fail)
-	def Handshake(self):
-		i = 0
-		self.Byte(0x00)
-		self.Send()
-		time.sleep(0.1)
-		# while (self.recnum < 26):
-		while (self.MYSERIAL1.in_waiting and self.recnum < 26):
-			# self.databuf[self.recnum] = struct.unpack('B', self.Read())[0]
-			self.databuf[self.recnum] = struct.unpack('B', self.MYSERIAL1.read())[0]
-
-			# ignore the invalid data
-			if self.databuf[0] != 0xAA:  # prevent the program from running.
-				if(self.recnum > 0):
-					self.recnum = 0
-					self.databuf = [None] * 26
+	# Retained drawing of a screen region
+	# Everything drawn inside the block is compared with what the region drew last time,
+	# and only the frames that changed, plus the ones overlapping them, are sent.
+	# Drawing anything else over the region, a screen clear, a JPG or a handshake
+	# (the panel may have reset) drops the region, so the next draw sends everything.
+	#  key: region name
+	#  rect: (xStart, yStart, xEnd, yEnd) area owned by the region,
+	#        defaults to the area of its frames (the whole screen when it shows icons)
+	#  with lcd.Region('status.bed', (158, 381, 271, 410)):
+	#      lcd.Draw_IntValue(...)
+	@contextmanager
+	def Region(self, key, rect=None):
+		with self.DWIN_Lock:
+			if self.DWIN_Region is not None:
+				raise RuntimeError("DWIN regions do not nest")
+			frames = self.DWIN_Region = []
+			try:
+				yield self
+			except BaseException:
+				self.DWIN_Regions.pop(key, None)
+				raise
+			finally:
+				self.DWIN_Region = None
+			self.Redraw(key, rect, frames)
+
+	# Send the part of a region that changed since it was last drawn
+	def Redraw(self, key, rect, frames):
+		old = self.DWIN_Regions.pop(key, None)
+		if rect:
+			area = tuple(rect)
+		else:
+			area = None
+			for frame in frames:
+				bounds = frame_bounds(frame, 0, len(frame))
+				if bounds is None:
+					area = None
+					break
+				area = bounds if area is None else (
+					min(area[0], bounds[0]), min(area[1], bounds[1]), max(area[2], bounds[2]), max(area[3], bounds[3])
+				)
+		send = frames
+		if old and old[0] == rect and not any(frame[1] == 0x05 and frame[2] == 2 for frame in frames):
+			send = self.Changed(old[1], frames)
+		for frame in send:
+			self.Damage(frame, key)
+			self.QueueFrame(frame)
+		self.region_skipped += len(frames) - len(send)
+		self.DWIN_Regions[key] = (rect, frames, area)
+
+	# Frames of new to send over the screen showing old
+	# XOR fills are not diffed, redrawing them is not idempotent
+	@staticmethod
+	def Changed(old, new):
+		damage = []
+		for i in range(max(len(old), len(new))):
+			a = old[i] if i < len(old) else None
+			b = new[i] if i < len(new) else None
+			if a == b:
 				continue
-			time.sleep(.010)
-			self.recnum += 1
-		return (self.recnum >= 3 and self.databuf[0] == 0xAA and self.databuf[1] == 0 and chr(self.databuf[2]) == 'O' and chr(self.databuf[3]) == 'K')
+			for frame in (a, b):
+				if frame is None:
+					continue
+				bounds = frame_bounds(frame, 0, len(frame))
+				if bounds is None:
+					return new
+				damage.append(bounds)
+		if not damage:
+			return []
+		send = []
+		for i, frame in enumerate(new):
+			bounds = frame_bounds(frame, 0, len(frame))
+			if bounds is None:
+				# Unknown area (icons), it may overlap the damage: redraw it and everything after it
+				return send + new[i:]
+			if any(bounds[0] <= d[2] and d[0] <= bounds[2] and bounds[1] <= d[3] and d[1] <= bounds[3] for d in damage):
+				send.append(frame)
+				damage.append(bounds)
+		return send
+
+	# Drop the regions a frame draws over
+	#  skip: region the frame belongs to; the regions it is nested in by name
+	#        ('status' for 'status.bed') own its area and are kept too
+	def Damage(self, frame, skip=None):
+		cmd = frame[1]
+		# Backlight, memory, JPG decodes into a virtual area and update don't draw on the screen
+		if cmd in (0x25, 0x30, 0x31, 0x32, 0x33, 0x3D):
+			return
+		bounds = frame_bounds(frame, 0, len(frame))
+		for key in list(self.DWIN_Regions):
+			if key == skip or skip and skip.startswith(key + '.'):
+				continue
+			area = self.DWIN_Regions[key][2]
+			if (
+				bounds is None or area is None
+				or bounds[0] <= area[2] and area[0] <= bounds[2] and bounds[1] <= area[3] and area[1] <= bounds[3]
+			):
+				del self.DWIN_Regions[key]
+
+	# The writer discarded a queued write, the regions its frames touch no longer match the panel
+	# and are drawn in full next time
+	def WriteDropped(self, data, starts):
+		with self.DWIN_Lock:
+			for i, start in enumerate(starts):
+				end = starts[i + 1] if i + 1 < len(starts) else len(data)
+				self.Damage(data[start:end])
+
+	# Sizes of icons in the panel flash, so drawing one only damages the regions under it
+	# An icon of unknown size is taken to reach the bottom right corner of the screen.
+	# The icon libraries are in the panel, so the table is shared by every screen object.
+	#  sizes: {picID: (width, height)}
+	@classmethod
+	def SetIconSizes(cls, libID, sizes):
+		for picID, size in sizes.items():
+			cls.DWIN_ICON_SIZES[(libID, picID)] = tuple(size)
+
+	# Forget the retained display list of one region, or of all of them
+	def Invalidate(self, key=None):
+		with self.DWIN_Lock:
+			if key is None:
+				self.DWIN_Regions.clear()
+			else:
+				self.DWIN_Regions.pop(key, None)
+
+	# True when the panel still shows what the region drew last
+	def IsValid(self, key):
+		return key in self.DWIN_Regions
+
+	# Hand data over to the serial port, or to the writer thread when there is one
+	#  starts: start offset of each frame in data
+	def Write(self, data, starts=(0,)):
+		if not self.present and not (len(starts) == 1 and data[1] == 0x00):
+			self.absent_dropped += 1
+			return
+		done = self.tracer.written() if self.tracer is not None else None
+		if self.writer:
+			self.writer.write(data, starts, done)
+		else:
+			self.pacer.write(self.MYSERIAL1.write, data, starts)
+			if done is not None:
+				done(self.pacer.sent_until)
+
+	# Collect every packet sent inside the block and write them with one UART write,
+	# either at UpdateLCD() time or when the outermost batch ends.
+	# Batches nest and hold the screen lock, so they also keep drawing threads apart.
+	#  with lcd.Batch():
+	#      lcd.Draw_Rectangle(...)
+	#      lcd.UpdateLCD()
+	@contextmanager
+	def Batch(self):
+		with self.DWIN_Lock:
+			self.DWIN_BatchDepth += 1
+			try:
+				yield self
+			finally:
+				self.DWIN_BatchDepth -= 1
+				if not self.DWIN_BatchDepth:
+					self.Flush()
+
+	# Write all queued packets at once
+	def Flush(self):
+		with self.DWIN_Lock:
+			if not self.DWIN_BatchLen:
+				return
+			if self.optimizer:
+				self.DWIN_BatchLen = self.optimizer.optimize(self.DWIN_BatchBuf, self.DWIN_BatchFrames, self.DWIN_BatchLen)
+			with memoryview(self.DWIN_BatchBuf)[:self.DWIN_BatchLen] as frames:
+				self.Write(frames, self.DWIN_BatchFrames)
+			self.DWIN_BatchLen = 0
+			self.DWIN_BatchFrames.clear()
+
+	# Send what is batched or queued, then stop the writer and reader threads, end the packet
+	# log and close the serial port. Call it last: the screen can't be drawn on afterwards.
+	def close(self):
+		self.Flush()
+		if self.writer:
+			self.writer.wait()
+			self.writer.close()
+		self.reader.close()
+		self.Record(None)
+		self.present = False
+		self.MYSERIAL1.close()
+
+	# Queue depth and drain time counters of the writer thread
+	def TransportStats(self):
+		if self.writer:
+			return self.writer.stats()
+		return None
+
+	# Start logging the packets written to the panel to path, replacing any running log
+	# Record(None) stops logging. Play a log back with dwinReplay.py.
+	def Record(self, path):
+		recorder = DWIN_Recorder(path) if path else None
+		old = self.pacer.recorder
+		self.pacer.recorder = recorder
+		if old:
+			old.close()
+
+	# Encode a single framed packet without sending it
+	#  data: bytes following the fixed fields
+	def Encode(self, fmt, *fields, data=b''):
+		self.Pack(fmt, *fields)
+		self.Bytes(data)
+		self.Bytes(self.DWIN_BufTail)
+		send = self.DWIN_Send
+		frame = bytes(send.buf[:send.len])
+		send.len = 1
+		return frame
+
+	# Encode a packet and write it at once, ahead of an open batch and past the optimizer
+	# For the commands the panel answers: the lock is only held for the write, so other
+	# threads keep drawing while the reply is awaited.
+	def SendNow(self, fmt, *fields, data=b''):
+		frame = self.Encode(fmt, *fields, data=data)
+		with self.DWIN_Lock:
+			if self.DWIN_Regions:
+				self.Damage(frame)
+			self.Write(frame)
+
+	# Write data followed by a handshake, unpaced, and time until the panel answers
+	# Returns the round trip in seconds, None when the panel did not answer
+	def RoundTrip(self, data=b'', timeout=2.0):
+		probe = data + self.Encode(self.DWIN_Packet[0x00], 0x00)
+		reply = self.reader.expect('handshake')
+		start = time.monotonic()
+		self.MYSERIAL1.write(probe)
+		try:
+			reply.result(timeout)
+		except FutureTimeout:
+			reply.cancel()
+			return None
+		return time.monotonic() - start - len(probe) * self.pacer.byte_time
+
+	# Measure the panel processing time of the paced commands and update the pacing table.
+	# Each command is sent a number of times at two sizes, followed by a handshake, and the handshake
+	# round trip on its own is taken off. Commands whose cost does not depend on a size (icons, JPGs)
+	# are measured once. Draws over the screen, run it before the first page.
+	# Commands not measured here (handshake, clear screen, numbers, QR codes, animation, backlight,
+	# memory, direction and update) keep the datasheet based values of DWIN_Pacer.COSTS.
+	# Returns the measured table, {command: (base uS, uS per unit)}
+	#  count: packets per measurement, a tenth of it (at least 2) for the JPG decodes
+	def Calibrate(self, count=20):
+		W, H = self.DWIN_WIDTH, self.DWIN_HEIGHT
+		slow = max(count // 10, 2)
+		point = struct.Struct('>HH')
+		samples = {
+			0x02: (count, (
+				self.Encode(self.DWIN_Packet[0x02], 0x02, 0xFFFF, 1, 1, data=point.pack(0, 0)),
+				self.Encode(
+					self.DWIN_Packet[0x02], 0x02, 0xFFFF, 15, 15,
+					data=b''.join(point.pack(16 * i, 0) for i in range(16))
+				),
+			)),
+			0x03: (count, (
+				self.Encode(self.DWIN_Packet[0x03], 0x03, 0xFFFF, 0, 0, 9, 0),
+				self.Encode(self.DWIN_Packet[0x03], 0x03, 0xFFFF, 0, 0, 0, H - 1),
+			)),
+			0x05: (count, (
+				self.Encode(self.DWIN_Packet[0x05], 0x05, 1, 0, 0, 0, 9, 9),
+				self.Encode(self.DWIN_Packet[0x05], 0x05, 1, 0, 0, 0, W - 1, H - 1),
+			)),
+			0x09: (count, (
+				self.Encode(self.DWIN_Packet[0x09], 0x09, 0x80 | 2, 1, 0, 0, 0, 9, 9),
+				self.Encode(self.DWIN_Packet[0x09], 0x09, 0x80 | 2, 16, 0, 0, 0, W - 1, H // 2 - 1),
+			)),
+			0x22: (slow, (self.Encode(self.DWIN_Packet[0x22], 0x22, 0x00, 0),)),
+			0x23: (count, (self.Encode(self.DWIN_Packet[0x23], 0x23, 0, 0, 0x80 | 9, 0),)),
+			0x25: (slow, (self.Encode(self.DWIN_Packet[0x25], 0x25, 1, 0),)),
+			0x27: (count, (
+				self.Encode(self.DWIN_Packet[0x27], 0x27, 0x80, 0, 0, 9, 9, 0, 0),
+				self.Encode(self.DWIN_Packet[0x27], 0x27, 0x80, 0, 0, W - 1, H // 2 - 1, 0, 0),
+			)),
+		}
+		# Strings carry their text behind the fixed fields
+		text = self.FHONE + self.DWIN_Packet[0x11].pack(0x11, self.font8x16, 0xFFFF, 0, 0, 0)
+		samples[0x11] = (count, (text + b'A' + self.DWIN_BufTail, text + b'A' * 32 + self.DWIN_BufTail))
+		table = {}
+		with self.DWIN_Lock:
+			if self.writer:
+				self.writer.wait()
+			rtt = self.RoundTrip()
+			if rtt is None:
+				return table
+			for cmd, (repeat, frames) in samples.items():
+				costs = []
+				for frame in frames:
+					elapsed = self.RoundTrip(frame * repeat, 2.0 + repeat * 0.1)
+					if elapsed is None:
+						return table
+					units = self.pacer.units(frame, 0, len(frame))
+					costs.append((units, max(elapsed - rtt, 0.0) / repeat * 1e6))
+				if len(costs) == 1:
+					table[cmd] = (costs[0][1], 0.0)
+					continue
+				(u0, c0), (u1, c1) = costs
+				per_unit = max((c1 - c0) / (u1 - u0), 0.0) if u1 != u0 else 0.0
+				table[cmd] = (max(c0 - per_unit * u0, 0.0), per_unit)
+			self.pacer.costs.update(table)
+			self.pacer.busy_until = 0.0
+		return table
+
+	# Next panel response no command waited for, see DWIN_Reader
+	# Returns a DWIN_Response, None after timeout seconds
+	def Read(self, timeout=1.0):
+		return self.reader.read(timeout)
+
+	# /*-------------------------------------- System variable function --------------------------------------*/
+
+	# Handshake, one round trip to the panel (True: Success, False: Fail)
+	# The probe is written at once, also from the prober thread while another one holds a batch open.
+	#  timeout: seconds to wait for the reply
+	def Handshake(self, timeout=0.5):
+		reply = self.reader.expect('handshake')
+		self.SendNow(self.DWIN_Packet[0x00], 0x00)
+		try:
+			reply.result(timeout)
+		except FutureTimeout:
+			reply.cancel()
+			return False
+		return True
 
 	# Set the backlight luminance
 	#  luminance: (0x00-0xFF)
 	def Backlight_SetLuminance(self, luminance):
-		self.Byte(0x30)
-		self.Byte(_MAX(luminance, 0x1F))
+		self.Pack(self.DWIN_Packet[0x30], 0x30, _MAX(luminance, 0x1F))
 		self.Send()
 
 	# Set screen display direction
 	#  dir: 0=0°, 1=90°, 2=180°, 3=270°
 	def Frame_SetDir(self, dir):
-		self.Byte(0x34)
-		self.Byte(0x5A)
-		self.Byte(0xA5)
-		self.Byte(dir)
+		self.Pack(self.DWIN_Packet[0x34], 0x34, 0x5A, 0xA5, dir)
 		self.Send()
 
 	# Update display
+	# Flushes the packets queued by an open batch
 	def UpdateLCD(self):
-		self.Byte(0x3D)
+		self.Pack(self.DWIN_Packet[0x3D], 0x3D)
 		self.Send()
+		self.Flush()
 
 	# /*---------------------------------------- Drawing functions ----------------------------------------*/
 
 	# Clear screen
 	#  color: Clear screen color
 	def Frame_Clear(self, color):
-		self.Byte(0x01)
-		self.Word(color)
+		self.Pack(self.DWIN_Packet[0x01], 0x01, color)
 		self.Send()
 
 	# Draw a point
@@ -159,11 +1352,7 @@ class T5UIC1_LCD:
 	#  height: point height 0x01-0x0F
 	#  x,y: upper left point
 	def Draw_Point(self, width, height, x, y):
-		self.Byte(0x02)
-		self.Byte(width)
-		self.Byte(height)
-		self.Word(x)
-		self.Word(y)
+		self.Pack(self.DWIN_PointPacket, 0x02, width, height, x, y)
 		self.Send()
 
 	# ___________________________________Draw points ____________________________________________\\
@@ -176,25 +1365,38 @@ class T5UIC1_LCD:
 	# Example: AA 02 F8 00 04 04 00 08 00 08 CC 33 C3 3C
 	# /**************Drawing point protocol command can draw multiple points at a time (this function only draws pixels in one position) ********** *****/
 	def DrawPoint(self, Color, Nx, Ny, X1, Y1):			  # Draw some
-		self.Byte(0x02)
-		self.Word(Color)
-		self.Byte(int(Nx))
-		self.Byte(int(Ny))
-		self.Word(int(X1))
-		self.Word(int(Y1))
-		self.Send()
+		self.DrawPoints(Color, Nx, Ny, ((X1, Y1),))
+
+	DWIN_POINTS_MAX = 60  # Points per packet, 250 byte frames
+
+	# Draw many points of the same color and size, DWIN_POINTS_MAX per packet
+	#  color: point color
+	#  nx, ny: point size, 0x01-0x0F
+	#  coords: (x, y) pairs, or an N x 2 NumPy array
+	# Points off the screen are skipped
+	def DrawPoints(self, color, nx, ny, coords):
+		if hasattr(coords, 'astype'):
+			coords = coords.reshape(-1, 2)
+			on_screen = (coords[:, 0] >= 0) & (coords[:, 0] < self.DWIN_WIDTH) & (coords[:, 1] >= 0) & (coords[:, 1] < self.DWIN_HEIGHT)
+			data = coords[on_screen].astype('>u2').tobytes()
+		else:
+			data = bytearray()
+			for x, y in coords:
+				if 0 <= x < self.DWIN_WIDTH and 0 <= y < self.DWIN_HEIGHT:
+					data += self._Point.pack(int(x), int(y))
+		step = self.DWIN_POINTS_MAX * self._Point.size
+		with self.Batch():
+			for offset in range(0, len(data), step):
+				self.Pack(self.DWIN_Packet[0x02], 0x02, color, nx, ny)
+				self.Bytes(data[offset:offset + step])
+				self.Send()
 
 	#  Draw a line
 	#   color: Line segment color
 	#   xStart/yStart: Start point
 	#   xEnd/yEnd: End point
 	def Draw_Line(self, color, xStart, yStart, xEnd, yEnd):
-		self.Byte(0x03)
-		self.Word(color)
-		self.Word(xStart)
-		self.Word(yStart)
-		self.Word(xEnd)
-		self.Word(yEnd)
+		self.Pack(self.DWIN_Packet[0x03], 0x03, color, xStart, yStart, xEnd, yEnd)
 		self.Send()
 
 	#  Draw a rectangle
@@ -203,13 +1405,7 @@ class T5UIC1_LCD:
 	#   xStart/yStart: upper left point
 	#   xEnd/yEnd: lower right point
 	def Draw_Rectangle(self, mode, color, xStart, yStart, xEnd, yEnd):
-		self.Byte(0x05)
-		self.Byte(mode)
-		self.Word(color)
-		self.Word(xStart)
-		self.Word(yStart)
-		self.Word(xEnd)
-		self.Word(yEnd)
+		self.Pack(self.DWIN_Packet[0x05], 0x05, mode, color, xStart, yStart, xEnd, yEnd)
 		self.Send()
 
 	#  Move a screen area
@@ -220,14 +1416,7 @@ class T5UIC1_LCD:
 	#   xStart/yStart: upper left point
 	#   xEnd/yEnd: bottom right point
 	def Frame_AreaMove(self, mode, dir, dis, color, xStart, yStart, xEnd, yEnd):
-		self.Byte(0x09)
-		self.Byte((mode << 7) | dir)
-		self.Word(dis)
-		self.Word(color)
-		self.Word(xStart)
-		self.Word(yStart)
-		self.Word(xEnd)
-		self.Word(yEnd)
+		self.Pack(self.DWIN_Packet[0x09], 0x09, (mode << 7) | dir, dis, color, xStart, yStart, xEnd, yEnd)
 		self.Send()
 
 	# ____________________________Draw a circle________________________________\\
@@ -236,48 +1425,27 @@ class T5UIC1_LCD:
 	# y0: ordinate of the center of the circle
 	# r: circle radius
 	def Draw_Circle(self, Color, x0, y0, r):  # Draw a circle
-		b = 0
-		a = 0
-		while(a <= b):
-			b = math.sqrt(r * r - a * a)
-			while(a == 0):
-				b = b - 1
-				break
-			self.DrawPoint(Color, 1, 1, x0 + a, y0 + b)		               # Draw some sector 1
-			self.DrawPoint(Color, 1, 1, x0 + b, y0 + a)		               # Draw some sector 2
-			self.DrawPoint(Color, 1, 1, x0 + b, y0 - a)		               # Draw some sector 3
-			self.DrawPoint(Color, 1, 1, x0 + a, y0 - b)		               # Draw some sector 4
-
-			self.DrawPoint(Color, 1, 1, x0 - a, y0 - b)		              # Draw some sector 5
-			self.DrawPoint(Color, 1, 1, x0 - b, y0 - a)		              # Draw some sector 6
-			self.DrawPoint(Color, 1, 1, x0 - b, y0 + a)		              # Draw some sector 7
-			self.DrawPoint(Color, 1, 1, x0 - a, y0 + b)		              # Draw some sector 8
-			a += 1
+		x0 = int(x0)
+		y0 = int(y0)
+		self.DrawPoints(Color, 1, 1, [(x0 + dx, y0 + dy) for dx, dy in circle_offsets(int(r))])
 
 	# ____________________________Circular Filling________________________________\\
 	# FColor: circle fill color
 	# x0: the abscissa of the center of the circle
 	# y0: ordinate of the center of the circle
 	# r: circle radius
+	# Drawn as horizontal spans, one rectangle fill per run of rows of the same width
 	def CircleFill(self, FColor, x0, y0, r):  # Round filling
-		b = 0
-		for i in range(r, 0, -1):
-			a = 0
-			while(a <= b):
-				b = math.sqrt(i * i - a * a)
-				while(a == 0):
-					b = b - 1
-					break
-				self.DrawPoint(FColor, 2, 2, x0 + a, y0 + b)  # Draw some sector 1
-				self.DrawPoint(FColor, 2, 2, x0 + b, y0 + a)  # raw some sector 2
-				self.DrawPoint(FColor, 2, 2, x0 + b, y0 - a)  # Draw some sector 3
-				self.DrawPoint(FColor, 2, 2, x0 + a, y0 - b)  # Draw some sector 4
-
-				self.DrawPoint(FColor, 2, 2, x0 - a, y0 - b)  # Draw some sector 5
-				self.DrawPoint(FColor, 2, 2, x0 - b, y0 - a)  # Draw some sector 6
-				self.DrawPoint(FColor, 2, 2, x0 - b, y0 + a)  # Draw some sector 7
-				self.DrawPoint(FColor, 2, 2, x0 - a, y0 + b)  # Draw some sector 8
-				a = a + 2
+		x0 = int(x0)
+		y0 = int(y0)
+		with self.Batch():
+			for dys, dye, w in circle_spans(int(r)):
+				xs = max(x0 - w, 0)
+				ys = max(y0 + dys, 0)
+				xe = min(x0 + w, self.DWIN_WIDTH - 1)
+				ye = min(y0 + dye, self.DWIN_HEIGHT - 1)
+				if xs <= xe and ys <= ye:
+					self.Draw_Rectangle(1, FColor, xs, ys, xe, ye)
 
 	# /*---------------------------------------- Text related functions ----------------------------------------*/
 
@@ -290,18 +1458,16 @@ class T5UIC1_LCD:
 	#   x/y: Upper-left coordinate of the string
 	#   *string: The string
 	def Draw_String(self, widthAdjust, bShow, size, color, bColor, x, y, string):
-		self.Byte(0x11)
+		key = (0x11, widthAdjust, bShow, size, color, bColor, x, y, string)
+		if self.SendCached(key):
+			return
 		# Bit 7: widthAdjust
 		# Bit 6: bShow
 		# Bit 5-4: Unused (0)
 		# Bit 3-0: size
-		self.Byte((widthAdjust * 0x80) | (bShow * 0x40) | size)
-		self.Word(color)
-		self.Word(bColor)
-		self.Word(x)
-		self.Word(y)
+		self.Pack(self.DWIN_Packet[0x11], 0x11, (widthAdjust * 0x80) | (bShow * 0x40) | size, color, bColor, x, y)
 		self.String(string)
-		self.Send()
+		self.Send(key)
 
 	#  Draw a positive integer
 	#   bShow: True=display background color; False=don't display background color
@@ -314,20 +1480,15 @@ class T5UIC1_LCD:
 	#   x/y: Upper-left coordinate
 	#   value: Integer value
 	def Draw_IntValue(self, bShow, zeroFill, zeroMode, size, color, bColor, iNum, x, y, value):
-		self.Byte(0x14)
 		# Bit 7: bshow
 		# Bit 6: 1 = signed; 0 = unsigned number;
 		# Bit 5: zeroFill
 		# Bit 4: zeroMode
 		# Bit 3-0: size
-		self.Byte((bShow * 0x80) | (zeroFill * 0x20) | (zeroMode * 0x10) | size)
-		self.Word(color)
-		self.Word(bColor)
-		self.Byte(iNum)
-		self.Byte(0)  # fNum
-		self.Word(x)
-		self.Word(y)
-		self.D64(value)
+		self.Pack(
+			self.DWIN_Packet[0x14], 0x14, (bShow * 0x80) | (zeroFill * 0x20) | (zeroMode * 0x10) | size,
+			color, bColor, iNum, 0, x, y, value  # fNum = 0
+		)
 		self.Send()
 
 	#  Draw a floating point number
@@ -342,32 +1503,41 @@ class T5UIC1_LCD:
 	#   x/y: Upper-left point
 	#   value: Float value
 	def Draw_FloatValue(self, bShow, zeroFill, zeroMode, size, color, bColor, iNum, fNum, x, y, value):
-		self.Byte(0x14)
-		self.Byte((bShow * 0x80) | (zeroFill * 0x20) | (zeroMode * 0x10) | size)
-		self.Word(color)
-		self.Word(bColor)
-		self.Byte(iNum)
-		self.Byte(fNum)
-		self.Word(x)
-		self.Word(y)
-		self.Long(value)
+		self.Pack(
+			self.DWIN_FloatPacket, 0x14, (bShow * 0x80) | (zeroFill * 0x20) | (zeroMode * 0x10) | size,
+			color, bColor, iNum, fNum, x, y, value
+		)
 		self.Send()
 
+	#  Draw a signed number, the panel puts the sign (or a space) in the first character cell
+	#   value: Integer value, fNum of its digits are shown as decimals
+	def Draw_SignedValue(self, bShow, zeroFill, zeroMode, size, color, bColor, iNum, fNum, x, y, value):
+		self.Pack(
+			self.DWIN_SignedPacket, 0x14, (bShow * 0x80) | 0x40 | (zeroFill * 0x20) | (zeroMode * 0x10) | size,
+			color, bColor, iNum, fNum, x, y, round(value)
+		)
+		self.Send()
+
+	# Signed number with its digits at x and the sign in the character cell left of x
 	def Draw_Signed_Float(self, size, bColor, iNum, fNum, x, y, value):
-		if value < 0:
-			self.Draw_String(False, True, size, self.Color_White, bColor, x - 6, y, "-")
-			self.Draw_FloatValue(True, True, 0, size, self.Color_White, bColor, iNum, fNum, x, y, -value)
-		else:
-			self.Draw_String(False, True, size, self.Color_White, bColor, x - 6, y, " ")
-			self.Draw_FloatValue(True, True, 0, size, self.Color_White, bColor, iNum, fNum, x, y, value)
+		w = self.DWIN_FONT_SIZES[size][0]
+		self.Draw_SignedValue(True, True, 0, size, self.Color_White, bColor, iNum, fNum, x - w, y, value)
+
+	# The numeric field for a format and position, created on first use
+	# See DWIN_NumericField, the arguments are the same.
+	def NumericField(self, size, iNum, fNum, x, y, signed=False, **options):
+		key = (size, iNum, fNum, x, y, signed)
+		field = self.DWIN_Fields.get(key)
+		if field is None:
+			field = self.DWIN_Fields[key] = DWIN_NumericField(self, size, iNum, fNum, x, y, signed, **options)
+		return field
 
 	# /*---------------------------------------- Picture related functions ----------------------------------------*/
 
 	# Draw JPG and cached in #0 virtual display area
 	# id: Picture ID
 	def JPG_ShowAndCache(self, id):
-		self.Word(0x2200)
-		self.Byte(id)
+		self.Pack(self.DWIN_Packet[0x22], 0x22, 0x00, id)
 		self.Send()  # AA 23 00 00 00 00 08 00 01 02 03 CC 33 C3 3C
 
 	#  Draw an Icon
@@ -375,24 +1545,21 @@ class T5UIC1_LCD:
 	#   picID: Icon ID
 	#   x/y: Upper-left point
 	def ICON_Show(self, libID, picID, x, y):
+		key = (0x23, libID, picID, x, y)
+		if self.SendCached(key):
+			return
 		if x > self.DWIN_WIDTH - 1:
 			x = self.DWIN_WIDTH - 1
 		if y > self.DWIN_HEIGHT - 1:
 			y = self.DWIN_HEIGHT - 1
-		self.Byte(0x23)
-		self.Word(x)
-		self.Word(y)
-		self.Byte(0x80 | libID)
-		self.Byte(picID)
-		self.Send()
+		self.Pack(self.DWIN_Packet[0x23], 0x23, x, y, 0x80 | libID, picID)
+		self.Send(key)
 
 	# Unzip the JPG picture to a virtual display area
 	#  n: Cache index
 	#  id: Picture ID
 	def JPG_CacheToN(self, n, id):
-		self.Byte(0x25)
-		self.Byte(n)
-		self.Byte(id)
+		self.Pack(self.DWIN_Packet[0x25], 0x25, n, id)
 		self.Send()
 
 	def JPG_CacheTo1(self, id):
@@ -404,15 +1571,11 @@ class T5UIC1_LCD:
 	#   xEnd/yEnd: Lower-right of virtual area
 	#   x/y: Screen paste point
 	def Frame_AreaCopy(self, cacheID, xStart, yStart, xEnd, yEnd, x, y):
-		self.Byte(0x27)
-		self.Byte(0x80 | cacheID)
-		self.Word(xStart)
-		self.Word(yStart)
-		self.Word(xEnd)
-		self.Word(yEnd)
-		self.Word(x)
-		self.Word(y)
-		self.Send()
+		key = (0x27, cacheID, xStart, yStart, xEnd, yEnd, x, y)
+		if self.SendCached(key):
+			return
+		self.Pack(self.DWIN_Packet[0x27], 0x27, 0x80 | cacheID, xStart, yStart, xEnd, yEnd, x, y)
+		self.Send(key)
 
 	def Frame_TitleCopy(self, id, x1, y1, x2, y2):
 		self.Frame_AreaCopy(id, x1, y1, x2, y2, 14, 8)
@@ -430,41 +1593,109 @@ class T5UIC1_LCD:
 			x = self.DWIN_WIDTH - 1
 		if y > self.DWIN_HEIGHT - 1:
 			y = self.DWIN_HEIGHT - 1
-		self.Byte(0x28)
-		self.Word(x)
-		self.Word(y)
 		# Bit 7: animation on or off
 		# Bit 6: start from begin or end
 		# Bit 5-4: unused (0)
 		# Bit 3-0: animID
-		self.Byte((animate * 0x80) | 0x40 | animID)
-		self.Byte(libID)
-		self.Byte(picIDs)
-		self.Byte(picIDe)
-		self.Byte(interval)
+		self.Pack(
+			self.DWIN_Packet[0x28], 0x28, x, y, (animate * 0x80) | 0x40 | animID,
+			libID, picIDs, picIDe, interval
+		)
 		self.Send()
 
 	#  Animation Control
 	#   state: 16 bits, each bit is the state of an animation id
 	def ICON_AnimationControl(self, state):
-		self.Byte(0x28)
-		self.Word(state)
+		self.Pack(self.DWIN_AnimationControlPacket, 0x28, state)
 		self.Send()
 
+	# ____________________________Bitmaps________________________________\\
+	# Plan the commands drawing a 1-bit or small palette image with its top left corner at (x, y)
+	# Each color is split into row runs, runs repeated on the next rows merge into one rectangle
+	# and single pixels go out as points. An opaque image starts with one fill of its most common color.
+	#  image: 2D NumPy array of palette indexes (bool for 1-bit), or a PIL image (1-bit, palette,
+	#         or anything else, quantized to 16 colors)
+	#  palette: RGB565 color of each index, defaults to black and white for 1-bit images
+	#  transparent: index that is not drawn, 0 (black) by default for 1-bit images
+	# Returns a DWIN_Blit, check its seconds before sending it with Draw_Blit()
+	def Bitmap_Plan(self, image, x, y, palette=None, transparent=None):
+		import numpy as np
+		from dwinGeometry import mask_to_rects, cost
+
+		if hasattr(image, 'getpalette'):
+			if image.mode == '1':
+				image = np.asarray(image, bool)
+			else:
+				if image.mode != 'P':
+					image = image.convert('RGB').quantize(16)
+				if palette is None:
+					rgb = image.getpalette()
+					palette = [
+						((rgb[i] >> 3) << 11) | ((rgb[i + 1] >> 2) << 5) | (rgb[i + 2] >> 3)
+						for i in range(0, len(rgb), 3)
+					]
+				image = np.asarray(image)
+		image = np.asarray(image)
+		if image.dtype == bool:
+			image = image.astype(np.uint8)
+			if palette is None:
+				palette = (self.Color_Bg_Black, self.Color_White)
+				if transparent is None:
+					transparent = 0
+		if palette is None:
+			raise ValueError("Bitmap_Plan needs a palette for index images")
+		# Clip to the screen
+		x = int(x)
+		y = int(y)
+		image = image[max(-y, 0):self.DWIN_HEIGHT - y, max(-x, 0):self.DWIN_WIDTH - x]
+		x = max(x, 0)
+		y = max(y, 0)
+		commands = []
+		indexes, counts = np.unique(image, return_counts=True)
+		background = None
+		if image.size and transparent not in indexes:
+			background = indexes[np.argmax(counts)]
+			h, w = image.shape
+			commands.append(('rect', palette[background], x, y, x + w - 1, y + h - 1))
+		for index in indexes:
+			if index == transparent or index == background:
+				continue
+			color = palette[index]
+			points = []
+			for command in mask_to_rects(image == index, color, x, y):
+				if command[2] == command[4] and command[3] == command[5]:
+					points.append(command[2:4])
+				else:
+					commands.append(command)
+			if points:
+				commands.append(('points', color, 1, 1, np.array(points)))
+		packets, total = cost(commands)
+		return DWIN_Blit(commands, packets, total, total * self.pacer.byte_time)
+
+	# Send a planned bitmap
+	def Draw_Blit(self, blit):
+		from dwinGeometry import draw
+		draw(self, blit.commands)
+
+	# Plan and draw a bitmap, see Bitmap_Plan()
+	#  max_time: skip drawing when the transfer would take longer, in seconds
+	# Returns the DWIN_Blit
+	def Draw_Bitmap(self, image, x, y, palette=None, transparent=None, max_time=None):
+		blit = self.Bitmap_Plan(image, x, y, palette, transparent)
+		if max_time is None or blit.seconds <= max_time:
+			self.Draw_Blit(blit)
+		return blit
+
 	# ____________________________Display QR code ________________________________\\
 	# QR_Pixel: The pixel size occupied by each point of the QR code: 0x01-0x0F (1-16)
 	# (Nx, Ny): The coordinates of the upper left corner displayed by the QR code
 	# str: multi-bit data
 	# /**************The size of the QR code is (46*QR_Pixel)*(46*QR_Pixle) dot matrix************/
 	def QR_Code(self, QR_Pixel, Xs, Ys, data):	    # Display QR code
-		self.Byte(0x21)  # Display QR code instruction
-		self.Word(Xs)  # Two-dimensional code Xs coordinate high eight
-		self.Word(Ys)  # The Ys coordinate of the QR code is eight high
-
-		if(QR_Pixel <= 6):  # Set the upper limit of pixels according to the actual screen size
-			self.Byte(QR_Pixel)  # Two-dimensional code pixel size
-		else:
-			self.Byte(0x06)  # The pixel size of the QR code exceeds the default of 1
+		if(QR_Pixel > 6):  # Set the upper limit of pixels according to the actual screen size
+			QR_Pixel = 0x06  # The pixel size of the QR code exceeds the default of 1
+		# Display QR code instruction, Xs/Ys coordinates, pixel size
+		self.Pack(self.DWIN_Packet[0x21], 0x21, Xs, Ys, QR_Pixel)
 		self.String(data)
 		self.Send()
 	# /*---------------------------------------- Memory functions ----------------------------------------*/
@@ -499,15 +1730,197 @@ class T5UIC1_LCD:
 	#   PicId: Picture Memory location, 0x00-0x0F
 	#
 	#   Flash writing returns 0xA5 0x4F 0x4B
-	# def sendPicture(self, PicId, SRAM, Address, data):
-	# 	self.Byte(0x31)
-	# 	if SRAM:
-	# 		self.Byte(0x5A)
-	# 	else:
-	# 		self.Byte(0xA5)
-	# 	self.Word(Address)
-	# 	self.DWIN_SendBuf += data
-	# 	self.Send()
+	DWIN_SRAM = 0x5A
+	DWIN_FLASH = 0xA5
+	DWIN_SRAM_SIZE = 0x8000
+	DWIN_FLASH_SIZE = 0x4000
+	DWIN_MEM_CHUNK = 0xF0  # Largest read, writes use the same chunk size
+	DWIN_READS_IN_FLIGHT = 2  # Chunk reads sent ahead of the reply being waited for
+
+	def MemorySize(self, flash):
+		return self.DWIN_FLASH_SIZE if flash else self.DWIN_SRAM_SIZE
+
+	# Write data to the SRAM or flash data memory
+	# Each chunk is a write of its own, so batches of other threads go out between them,
+	# and flash chunks wait for the ACK of the previous one.
+	#  flash: write the flash instead of the SRAM
+	#  verify: read the data back and compare
+	#  timeout: seconds to wait for each ACK or read
+	# Returns True when the data was written (and read back the same)
+	def Memory_Write(self, address, data, flash=False, verify=False, timeout=1.0):
+		if address < 0 or address + len(data) > self.MemorySize(flash):
+			raise ValueError("DWIN memory write out of range")
+		if not self.present:
+			return False
+		with memoryview(data) as view, self.DWIN_MemoryLock:
+			for offset in range(0, len(data), self.DWIN_MEM_CHUNK):
+				if flash:
+					ack = self.reader.expect('ack')
+				self.SendNow(
+					self.DWIN_Packet[0x31], 0x31, self.DWIN_FLASH if flash else self.DWIN_SRAM, address + offset,
+					data=view[offset:offset + self.DWIN_MEM_CHUNK]
+				)
+				if flash:
+					try:
+						ack.result(timeout)
+					except FutureTimeout:
+						ack.cancel()
+						return False
+			if verify:
+				return self.Memory_Read(address, len(data), flash, timeout) == bytes(data)
+		return True
+
+	# Read length bytes of the SRAM or flash data memory
+	# Chunk reads are sent at most DWIN_READS_IN_FLIGHT ahead of the replies collected, the pacer
+	# only knows the request bytes, so this keeps the replies from piling up in the panel.
+	# Returns the data, None when the panel did not answer
+	def Memory_Read(self, address, length, flash=False, timeout=1.0):
+		if address < 0 or length < 0 or address + length > self.MemorySize(flash):
+			raise ValueError("DWIN memory read out of range")
+		if not self.present:
+			return None
+		pending = deque()
+		data = bytearray()
+		with self.DWIN_MemoryLock:
+			for offset in range(0, length, self.DWIN_MEM_CHUNK):
+				if len(pending) >= self.DWIN_READS_IN_FLIGHT:
+					chunk = self.MemoryReply(pending, timeout)
+					if chunk is None:
+						return None
+					data += chunk
+				pending.append(self.reader.expect('memory'))
+				self.SendNow(
+					self.DWIN_Packet[0x32], 0x32, self.DWIN_FLASH if flash else self.DWIN_SRAM, address + offset,
+					min(self.DWIN_MEM_CHUNK, length - offset)
+				)
+			while pending:
+				chunk = self.MemoryReply(pending, timeout)
+				if chunk is None:
+					return None
+				data += chunk
+		return bytes(data)
+
+	# Data of the oldest outstanding read, None when it timed out and every read is cancelled
+	def MemoryReply(self, pending, timeout):
+		reply = pending.popleft()
+		try:
+			return reply.result(timeout).data
+		except FutureTimeout:
+			reply.cancel()
+			for reply in pending:
+				reply.cancel()
+			pending.clear()
+			return None
+
+	# Copy the 32KB SRAM data memory into a picture memory slot
+	#  picID: Picture memory location, 0x00-0x0F
+	# Returns True once the panel acknowledged it
+	def Picture_Write(self, picID, timeout=5.0):
+		if not self.present:
+			return False
+		with self.DWIN_MemoryLock:
+			ack = self.reader.expect('ack')
+			self.SendNow(self.DWIN_Packet[0x33], 0x33, 0x5A, 0xA5, picID)
+			try:
+				ack.result(timeout)
+			except FutureTimeout:
+				ack.cancel()
+				return False
+		return True
+
+	# Upload a JPG into a picture slot through the SRAM, show it later with JPG_ShowAndCache(picID)
+	# The screen lock is only taken chunk by chunk, so the UI keeps drawing during the upload.
+	#  jpg: JPG file contents or file name, at most 32KB
+	# Returns True when the picture was verified in SRAM and stored
+	def JPG_Upload(self, picID, jpg, verify=True):
+		if isinstance(jpg, str):
+			with open(jpg, 'rb') as f:
+				jpg = f.read()
+		if not 0 <= picID <= 0x0F:
+			raise ValueError("DWIN picture slot must be 0x00-0x0F")
+		with self.DWIN_MemoryLock:
+			if not self.Memory_Write(0, jpg, verify=verify):
+				return False
+			return self.Picture_Write(picID)
 
 	# --------------------------------------------------------------#
 	# --------------------------------------------------------------#
+
+
+# A number shown at a fixed position and format
+# The field remembers the value and colors it drew last and draws in a region of its own, so the
+# number is only sent again when it changed or something else was drawn over it.
+# Values are in real units, the field scales them to fNum decimals: 12.3 with fNum 1 is sent as 123.
+#  lcd: T5UIC1_LCD
+#  size: Font size
+#  iNum/fNum: Number of whole and decimal digits
+#  x/y: Upper-left point of the digits
+#  signed: Native signed number, the sign goes in the character cell left of x
+#  key: Region name, 'status.bed' style names keep the enclosing 'status' region valid
+class DWIN_NumericField:
+	def __init__(
+		self, lcd, size, iNum, fNum, x, y, signed=False,
+		color=T5UIC1_LCD.Color_White, bColor=T5UIC1_LCD.Color_Bg_Black,
+		bShow=True, zeroFill=True, zeroMode=0, key=None
+	):
+		self.lcd = lcd
+		self.size = size
+		self.iNum = iNum
+		self.fNum = fNum
+		self.x = x
+		self.y = y
+		self.signed = signed
+		self.color = color
+		self.bColor = bColor
+		self.bShow = bShow
+		self.zeroFill = zeroFill
+		self.zeroMode = zeroMode
+		self.key = key or 'field.%d.%d' % (x, y)
+		self.scale = 10 ** fNum
+		self.last = None  # (value, color, bColor) on the panel
+		self.skipped = 0
+
+	# Fixed point value for a value in real units
+	def Scale(self, value):
+		return int(round(value * self.scale))
+
+	# Draw value, unless the panel already shows it
+	#  color/bColor: instead of the field colors, e.g. Select_Color while the value is edited
+	# Returns True when the field was sent
+	def Draw(self, value, color=None, bColor=None):
+		return self.DrawScaled(self.Scale(value), color, bColor)
+
+	# Draw a value that is already fixed point, like Move_X_scale or offset_value
+	def DrawScaled(self, value, color=None, bColor=None):
+		state = (
+			int(round(value)),
+			self.color if color is None else color,
+			self.bColor if bColor is None else bColor,
+		)
+		if state == self.last and self.lcd.IsValid(self.key):
+			self.skipped += 1
+			return False
+		value, color, bColor = state
+		with self.lcd.Region(self.key):
+			if self.signed:
+				w = self.lcd.DWIN_FONT_SIZES[self.size][0]
+				self.lcd.Draw_SignedValue(
+					self.bShow, self.zeroFill, self.zeroMode, self.size, color, bColor,
+					self.iNum, self.fNum, self.x - w, self.y, value
+				)
+			elif self.fNum:
+				self.lcd.Draw_FloatValue(
+					self.bShow, self.zeroFill, self.zeroMode, self.size, color, bColor,
+					self.iNum, self.fNum, self.x, self.y, max(value, 0)
+				)
+			else:
+				self.lcd.Draw_IntValue(
+					self.bShow, self.zeroFill, self.zeroMode, self.size, color, bColor,
+					self.iNum, self.x, self.y, max(value, 0)
+				)
+		self.last = state
+		return True
+
+	# Draw on the next call whatever the value
+	def Invalidate(self):
+		self.last = None
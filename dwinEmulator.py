@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# Software T5UIC1 panel: parses the DWIN packet stream into a 272x480 RGB565 framebuffer.
+# Fonts, icons and JPGs live in the panel flash, so text and icons are drawn as placeholder
+# boxes and unknown JPGs as a numbered pattern, in the right place and size.
+#
+#   python3 dwinEmulator.py --log session.dwinlog --png screen.png
+#   python3 dwinEmulator.py --pty --png screen.png
+#
+# With --pty a pseudo terminal is opened and its name printed; run the unmodified
+# T5UIC1_LCD (or DWIN_LCD) against it and a snapshot is written on every UpdateLCD().
+import os
+import sys
+import tty
+import zlib
+import struct
+import argparse
+import threading
+
+import numpy as np
+
+from DWIN_Screen import T5UIC1_LCD, DWIN_Reader, DWIN_Recorder, split_frames
+
+
+# Convert an RGB565 framebuffer to an (h, w, 3) uint8 RGB image
+def rgb565_to_rgb(fb):
+	fb = fb.astype(np.uint32)
+	rgb = np.empty(fb.shape + (3,), np.uint8)
+	rgb[..., 0] = ((fb >> 11) & 0x1F) * 255 // 31
+	rgb[..., 1] = ((fb >> 5) & 0x3F) * 255 // 63
+	rgb[..., 2] = (fb & 0x1F) * 255 // 31
+	return rgb
+
+
+# Write an (h, w, 3) uint8 image as a PNG file
+def write_png(path, rgb):
+	h, w = rgb.shape[:2]
+	raw = np.zeros((h, w * 3 + 1), np.uint8)  # Filter type 0 in front of every row
+	raw[:, 1:] = rgb.reshape(h, w * 3)
+
+	def chunk(kind, data):
+		return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+	with open(path, 'wb') as f:
+		f.write(b'\x89PNG\r\n\x1a\n')
+		f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 2, 0, 0, 0)))
+		f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+		f.write(chunk(b'IEND', b''))
+
+
+class DWIN_Emulator:
+	WIDTH = T5UIC1_LCD.DWIN_WIDTH
+	HEIGHT = T5UIC1_LCD.DWIN_HEIGHT
+	HEADER = T5UIC1_LCD.FHONE
+	TAIL = T5UIC1_LCD.DWIN_BufTail
+	ICON_SIZE = (24, 24)  # Placeholder icon size when the icon is not in self.icons
+
+	#  on_update: called with the emulator on every 0x3D update
+	def __init__(self, on_update=None):
+		self.fb = np.zeros((self.HEIGHT, self.WIDTH), np.uint16)
+		self.areas = {}  # Virtual display areas by cache ID
+		self.jpgs = {}  # JPG id: RGB565 array, see load_jpg()
+		self.icons = {}  # (libID, picID): RGB565 array
+		self.on_update = on_update
+		self.reply = None  # Function writing the panel responses
+		self.pty = None
+		self.rx = bytearray()
+		self.frames = 0
+		self.updates = 0
+		self.unknown = {}  # Command: count of packets not understood
+		self.backlight = 0xFF
+		self.direction = 0
+		self.sram = bytearray(T5UIC1_LCD.DWIN_SRAM_SIZE)
+		self.flash = bytearray(T5UIC1_LCD.DWIN_FLASH_SIZE)
+		self.pictures = {}  # Picture memory slot: SRAM contents written with 0x33
+		self.handlers = {
+			0x00: self.handshake,
+			0x01: self.clear,
+			0x02: self.points,
+			0x03: self.line,
+			0x05: self.rectangle,
+			0x09: self.area_move,
+			0x11: self.string,
+			0x14: self.number,
+			0x21: self.qr,
+			0x22: self.jpg_show,
+			0x23: self.icon,
+			0x25: self.jpg_cache,
+			0x27: self.area_copy,
+			0x28: self.ignore,
+			0x30: self.set_backlight,
+			0x31: self.memory_write,
+			0x32: self.memory_read,
+			0x33: self.picture_write,
+			0x34: self.set_direction,
+			0x3D: self.update,
+		}
+
+	# Provide the picture for a JPG id, as a HEIGHT x WIDTH RGB565 array
+	def load_jpg(self, id, fb):
+		self.jpgs[id] = np.asarray(fb, np.uint16)
+
+	# Color of a pixel, RGB565
+	def pixel(self, x, y):
+		return int(self.fb[y, x])
+
+	def snapshot(self, path):
+		write_png(path, rgb565_to_rgb(self.fb))
+
+	# Parse bytes received from the host, frames may be split over several calls
+	def feed(self, data):
+		self.rx += data
+		for packet in split_frames(self.rx):
+			self.execute(packet)
+
+	# Run one packet, command byte first, without header and tail
+	def execute(self, packet):
+		if not packet:
+			return
+		self.frames += 1
+		handler = self.handlers.get(packet[0])
+		try:
+			if handler is None:
+				raise ValueError
+			handler(packet)
+		except (ValueError, IndexError, struct.error):
+			self.unknown[packet[0]] = self.unknown.get(packet[0], 0) + 1
+
+	def respond(self, payload):
+		if self.reply:
+			self.reply(self.HEADER + payload + self.TAIL)
+
+	# Clip an inclusive rectangle to the screen, returns slices or None when nothing is left
+	def clip(self, xs, ys, xe, ye):
+		if xs > xe:
+			xs, xe = xe, xs
+		if ys > ye:
+			ys, ye = ye, ys
+		xs = max(xs, 0)
+		ys = max(ys, 0)
+		xe = min(xe, self.WIDTH - 1)
+		ye = min(ye, self.HEIGHT - 1)
+		if xs > xe or ys > ye:
+			return None
+		return slice(ys, ye + 1), slice(xs, xe + 1)
+
+	def fill(self, color, xs, ys, xe, ye):
+		area = self.clip(xs, ys, xe, ye)
+		if area:
+			self.fb[area] = color
+
+	def ignore(self, packet):
+		pass
+
+	def handshake(self, packet):
+		self.respond(b'\x00OK')
+
+	def clear(self, packet):
+		_, color = T5UIC1_LCD.DWIN_Packet[0x01].unpack_from(packet)
+		self.fb[:] = color
+
+	def points(self, packet):
+		if len(packet) == 7:
+			# Draw_Point: width, height, x, y in the current color, white on a stock panel
+			_, nx, ny, x, y = struct.unpack('>BBBHH', packet)
+			self.fill(0xFFFF, x, y, x + nx - 1, y + ny - 1)
+			return
+		_, color, nx, ny = T5UIC1_LCD.DWIN_Packet[0x02].unpack_from(packet)
+		coords = np.frombuffer(packet, '>u2', offset=5).reshape(-1, 2)
+		for x, y in coords:
+			self.fill(color, int(x), int(y), int(x) + nx - 1, int(y) + ny - 1)
+
+	def line(self, packet):
+		_, color, xs, ys, xe, ye = T5UIC1_LCD.DWIN_Packet[0x03].unpack_from(packet)
+		n = max(abs(xe - xs), abs(ye - ys)) + 1
+		x = np.rint(np.linspace(xs, xe, n)).astype(np.intp)
+		y = np.rint(np.linspace(ys, ye, n)).astype(np.intp)
+		keep = (x < self.WIDTH) & (y < self.HEIGHT)
+		self.fb[y[keep], x[keep]] = color
+
+	def rectangle(self, packet):
+		_, mode, color, xs, ys, xe, ye = T5UIC1_LCD.DWIN_Packet[0x05].unpack_from(packet)
+		if mode == 0:
+			self.fill(color, xs, ys, xe, ys)
+			self.fill(color, xs, ye, xe, ye)
+			self.fill(color, xs, ys, xs, ye)
+			self.fill(color, xe, ys, xe, ye)
+		elif mode == 1:
+			self.fill(color, xs, ys, xe, ye)
+		elif mode == 2:
+			area = self.clip(xs, ys, xe, ye)
+			if area:
+				self.fb[area] ^= np.uint16(color)
+		else:
+			raise ValueError
+
+	def area_move(self, packet):
+		_, mode, dis, color, xs, ys, xe, ye = T5UIC1_LCD.DWIN_Packet[0x09].unpack_from(packet)
+		area = self.clip(xs, ys, xe, ye)
+		if not area:
+			return
+		dir = mode & 0x7F
+		axis = 1 if dir < 2 else 0
+		shift = -dis if dir in (0, 2) else dis
+		block = np.roll(self.fb[area], shift, axis=axis)
+		if mode & 0x80 and dis:
+			# Translation: the vacated strip takes the fill color
+			vacated = [slice(None), slice(None)]
+			vacated[axis] = slice(shift, None) if shift < 0 else slice(0, shift)
+			block[tuple(vacated)] = color
+		self.fb[area] = block
+
+	# Placeholder text: a box per visible character, inset in its character cell
+	def text(self, flags, color, bColor, x, y, text):
+		w, h = T5UIC1_LCD.DWIN_FONT_SIZES[min(flags & 0x0F, 9)]
+		if flags & 0x40:  # bShow
+			self.fill(bColor, x, y, x + w * len(text) - 1, y + h - 1)
+		mx = max(w // 6, 1)
+		my = max(h // 6, 1)
+		for i, c in enumerate(text):
+			if c == ' ':
+				continue
+			cx = x + i * w
+			if c in '.,:;-':
+				# Narrow punctuation, so numbers stay readable on snapshots
+				self.fill(color, cx + w // 2 - mx, y + h - 3 * my, cx + w // 2 + mx - 1, y + h - my - 1)
+			else:
+				self.fill(color, cx + mx, y + my, cx + w - mx - 1, y + h - my - 1)
+
+	def string(self, packet):
+		fmt = T5UIC1_LCD.DWIN_Packet[0x11]
+		_, flags, color, bColor, x, y = fmt.unpack_from(packet)
+		self.text(flags, color, bColor, x, y, packet[fmt.size:].decode('utf-8', 'replace'))
+
+	def number(self, packet):
+		_, flags, color, bColor, iNum, fNum, x, y = struct.unpack_from('>BBHHBBHH', packet)
+		raw = packet[12:]
+		if len(raw) not in (4, 8):
+			raise ValueError
+		value = int.from_bytes(raw, 'big', signed=bool(flags & 0x40))
+		sign = ''
+		if flags & 0x40:
+			sign = '-' if value < 0 else ' '
+			value = abs(value)
+		digits = str(value).rjust(iNum + fNum, '0')
+		whole = digits[:len(digits) - fNum][-iNum:] if iNum else ''
+		frac = digits[len(digits) - fNum:]
+		if not flags & 0x20:  # No zero fill, leading zeros as spaces
+			whole = (whole.lstrip('0') or whole[-1:]).rjust(iNum)
+		text = sign + whole + ('.' + frac if fNum else '')
+		# bShow is bit 7 for numbers
+		self.text((flags & 0x0F) | (0x40 if flags & 0x80 else 0), color, bColor, x, y, text)
+
+	def qr(self, packet):
+		_, x, y, pixel = T5UIC1_LCD.DWIN_Packet[0x21].unpack_from(packet)
+		size = 46 * pixel
+		self.fill(0xFFFF, x, y, x + size - 1, y + size - 1)
+		self.fill(0x0000, x + pixel, y + pixel, x + size - pixel - 1, y + size - pixel - 1)
+
+	# Picture for a JPG id, or a numbered placeholder pattern
+	def picture(self, id):
+		fb = self.jpgs.get(id)
+		if fb is not None:
+			return fb.copy()
+		fb = np.full((self.HEIGHT, self.WIDTH), (id * 0x2945 + 0x1082) & 0xFFFF, np.uint16)
+		fb[::16, :] = 0x8410
+		fb[:, ::16] = 0x8410
+		return fb
+
+	def jpg_show(self, packet):
+		_, _, id = T5UIC1_LCD.DWIN_Packet[0x22].unpack_from(packet)
+		self.areas[0] = self.picture(id)
+		self.fb[:] = self.areas[0]
+
+	def jpg_cache(self, packet):
+		_, n, id = T5UIC1_LCD.DWIN_Packet[0x25].unpack_from(packet)
+		self.areas[n] = self.picture(id)
+
+	def icon(self, packet):
+		_, x, y, lib, pic = T5UIC1_LCD.DWIN_Packet[0x23].unpack_from(packet)
+		image = self.icons.get((lib & 0x7F, pic))
+		if image is None:
+			w, h = self.ICON_SIZE
+			color = (pic * 0x0861 + 0x4208) & 0xFFFF
+			self.fill(color, x, y, x + w - 1, y + h - 1)
+			self.fill(0xFFFF, x, y, x + w - 1, y)
+			self.fill(0xFFFF, x, y, x, y + h - 1)
+			return
+		self.blit(image, x, y)
+
+	def blit(self, image, x, y):
+		h, w = image.shape
+		area = self.clip(x, y, x + w - 1, y + h - 1)
+		if area:
+			rows, cols = area
+			self.fb[area] = image[rows.start - y:rows.stop - y, cols.start - x:cols.stop - x]
+
+	def area_copy(self, packet):
+		_, cache, xs, ys, xe, ye, x, y = T5UIC1_LCD.DWIN_Packet[0x27].unpack_from(packet)
+		source = self.areas.get(cache & 0x7F)
+		if source is None:
+			source = self.picture(-1 - (cache & 0x7F))
+		area = self.clip(xs, ys, xe, ye)
+		if area:
+			self.blit(source[area], x, y)
+
+	def memory(self, kind):
+		if kind == T5UIC1_LCD.DWIN_SRAM:
+			return self.sram
+		if kind == T5UIC1_LCD.DWIN_FLASH:
+			return self.flash
+		raise ValueError
+
+	def memory_write(self, packet):
+		fmt = T5UIC1_LCD.DWIN_Packet[0x31]
+		_, kind, address = fmt.unpack_from(packet)
+		memory = self.memory(kind)
+		data = packet[fmt.size:]
+		if address + len(data) > len(memory):
+			raise ValueError
+		memory[address:address + len(data)] = data
+		if kind == T5UIC1_LCD.DWIN_FLASH:
+			self.respond(DWIN_Reader.ACK)
+
+	def memory_read(self, packet):
+		_, kind, address, length = T5UIC1_LCD.DWIN_Packet[0x32].unpack_from(packet)
+		data = self.memory(kind)[address:address + length]
+		self.respond(packet[:4] + bytes((len(data),)) + data)
+
+	def picture_write(self, packet):
+		_, _, _, picID = T5UIC1_LCD.DWIN_Packet[0x33].unpack_from(packet)
+		self.pictures[picID] = bytes(self.sram)
+		self.respond(DWIN_Reader.ACK)
+
+	def set_backlight(self, packet):
+		self.backlight = packet[1]
+
+	def set_direction(self, packet):
+		self.direction = packet[3]
+
+	def update(self, packet):
+		self.updates += 1
+		if self.on_update:
+			self.on_update(self)
+
+	# Expose the emulator on a pseudo terminal, T5UIC1_LCD can open the returned name
+	def attach(self):
+		master, slave = os.openpty()
+		tty.setraw(slave)
+		self.pty = (master, slave)
+		self.reply = lambda data: os.write(master, data)
+		self.thread = threading.Thread(target=self.serve, args=(master,), name='DWIN_Emulator', daemon=True)
+		self.thread.start()
+		return os.ttyname(slave)
+
+	def serve(self, master):
+		while True:
+			try:
+				data = os.read(master, 4096)
+			except OSError:
+				return
+			if not data:
+				return
+			self.feed(data)
+
+	def detach(self):
+		master, slave = self.pty
+		os.close(slave)
+		os.close(master)
+		self.thread.join(1)
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Emulate a DWIN T5UIC1 panel")
+	source = parser.add_mutually_exclusive_group(required=True)
+	source.add_argument('--log', help="render a log written by T5UIC1_LCD.Record()")
+	source.add_argument('--pty', action='store_true', help="serve a pseudo terminal until interrupted")
+	parser.add_argument('--png', default='dwin.png', help="snapshot file (default dwin.png)")
+	args = parser.parse_args(argv)
+
+	if args.log:
+		emulator = DWIN_Emulator()
+		for t, frame in DWIN_Recorder.read(args.log):
+			emulator.feed(frame)
+		emulator.snapshot(args.png)
+		print("%d frames, %d updates, unknown commands: %s" % (emulator.frames, emulator.updates, emulator.unknown or 'none'))
+		return 0
+
+	emulator = DWIN_Emulator(on_update=lambda e: e.snapshot(args.png))
+	print("DWIN panel on", emulator.attach())
+	try:
+		threading.Event().wait()
+	except KeyboardInterrupt:
+		pass
+	emulator.detach()
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
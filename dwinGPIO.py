@@ -0,0 +1,239 @@
+# GPIO input backends for the encoder and its button
+# Every backend sets pins up as inputs with the pull up on, and reports edges as
+#   callback(pin, level, timestamp)
+# with the level after the edge and a time.monotonic() based timestamp in seconds.
+#
+#   RPiGPIO      RPi.GPIO, one callback thread, the level is read at each edge
+#   Gpiod        libgpiod v2 character device: every line on one request made up front, edge
+#                events read in batches with their kernel timestamps by a single thread
+#   SimulatedGPIO  in process pins for tests and benchmarks, edges and waveforms are injected
+#
+# Backends take the pins they will watch, so a missing chip or a line in use fails when the
+# backend is made. open_backend() picks one by name, or the first that opens: gpiod, then RPi.GPIO.
+import time
+import threading
+
+
+class RPiGPIO:
+
+	#  pins: pins to set up now
+	def __init__(self, pins=()):
+		import RPi.GPIO as GPIO
+		self.GPIO = GPIO
+		GPIO.setmode(GPIO.BCM)
+		self.pins = set()
+		for pin in pins:
+			self.setup(pin)
+
+	def setup(self, pin):
+		self.GPIO.setup(pin, self.GPIO.IN, pull_up_down=self.GPIO.PUD_UP)
+
+	def input(self, pin):
+		return self.GPIO.input(pin)
+
+	def watch(self, pin, callback):
+		self.setup(pin)
+		read = self.GPIO.input
+
+		def edge(channel):
+			now = time.monotonic()
+			callback(pin, read(pin), now)
+
+		self.GPIO.add_event_detect(pin, self.GPIO.BOTH, callback=edge)
+		self.pins.add(pin)
+
+	def unwatch(self, pin):
+		if pin in self.pins:
+			self.GPIO.remove_event_detect(pin)
+			self.pins.discard(pin)
+
+	def close(self):
+		for pin in list(self.pins):
+			self.unwatch(pin)
+
+
+class Gpiod:
+
+	#  chip: GPIO character device, BCM numbers are the line offsets of the main chip
+	#  debounce: kernel debounce period in seconds, 0 for none
+	#  pins: lines to request now, watching other ones later requests the lines again
+	def __init__(self, chip='/dev/gpiochip0', debounce=0.0, pins=()):
+		import gpiod
+		from gpiod.line import Bias, Clock, Direction, Edge
+		self.gpiod = gpiod
+		self.chip = chip
+		self.settings = dict(
+			direction=Direction.INPUT, bias=Bias.PULL_UP, edge_detection=Edge.BOTH, event_clock=Clock.MONOTONIC
+		)
+		if debounce:
+			from datetime import timedelta
+			self.settings['debounce_period'] = timedelta(seconds=debounce)
+		self.rising = gpiod.EdgeEvent.Type.RISING_EDGE
+		self.active = gpiod.line.Value.ACTIVE
+		self.callbacks = {}
+		self.lines = ()  # Offsets held by the request
+		self.request = None
+		self.lock = threading.Lock()
+		self.running = False
+		self.thread = None
+		self.batches = 0
+		self.events = 0
+		gpiod.Chip(chip).close()  # OSError when the chip is missing or not accessible
+		if pins:
+			self.reconfigure(tuple(pins))
+
+	# One request holds every line, it is made again only for a line it does not hold
+	def reconfigure(self, lines):
+		self.stop()
+		if self.request is not None:
+			self.request.release()
+			self.request = None
+			self.lines = ()
+		if not lines:
+			return
+		self.request = self.gpiod.request_lines(
+			self.chip, consumer='DWIN_T5UIC1_LCD',
+			config={lines: self.gpiod.LineSettings(**self.settings)}
+		)
+		self.lines = lines
+		self.running = True
+		self.thread = threading.Thread(target=self.run, name='DWIN_GPIO', daemon=True)
+		self.thread.start()
+
+	def stop(self):
+		self.running = False
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+
+	def run(self):
+		request = self.request
+		callbacks = self.callbacks
+		rising = self.rising
+		while self.running:
+			if not request.wait_edge_events(0.1):
+				continue
+			events = request.read_edge_events()
+			self.batches += 1
+			self.events += len(events)
+			for event in events:
+				callback = callbacks.get(event.line_offset)
+				if callback is not None:
+					callback(event.line_offset, 1 if event.event_type == rising else 0, event.timestamp_ns * 1e-9)
+
+	def input(self, pin):
+		return 1 if self.request.get_value(pin) == self.active else 0
+
+	def watch(self, pin, callback):
+		with self.lock:
+			self.callbacks[pin] = callback
+			if pin not in self.lines:
+				self.reconfigure(self.lines + (pin,))
+
+	# The line stays requested, its edges are ignored
+	def unwatch(self, pin):
+		with self.lock:
+			self.callbacks.pop(pin, None)
+
+	def close(self):
+		with self.lock:
+			self.callbacks.clear()
+			self.reconfigure(())
+
+
+class SimulatedGPIO:
+
+	# Gray code order of (a << 1) | b for a turn in the positive direction, see encoder.TRANSITIONS
+	QUADRATURE = (0b00, 0b01, 0b11, 0b10)
+
+	def __init__(self, pins=()):
+		self.levels = {pin: 1 for pin in pins}
+		self.callbacks = {}
+		self.edges = 0
+
+	def input(self, pin):
+		return self.levels.get(pin, 1)  # Pulled up
+
+	def watch(self, pin, callback):
+		self.levels.setdefault(pin, 1)
+		self.callbacks[pin] = callback
+
+	def unwatch(self, pin):
+		self.callbacks.pop(pin, None)
+
+	def close(self):
+		self.callbacks.clear()
+
+	# Drive a pin, the edge is reported from the calling thread
+	#  when: timestamp of the edge, now by default
+	def set(self, pin, level, when=None):
+		level = 1 if level else 0
+		if self.levels.get(pin, 1) == level:
+			return
+		self.levels[pin] = level
+		self.edges += 1
+		callback = self.callbacks.get(pin)
+		if callback is not None:
+			callback(pin, level, time.monotonic() if when is None else when)
+
+	# Play (t, pin, level) edges, t in seconds from the start
+	#  realtime: wait for each edge, otherwise only the timestamps are spaced
+	def play(self, edges, realtime=False):
+		start = time.monotonic()
+		for t, pin, level in edges:
+			if realtime:
+				wait = start + t - time.monotonic()
+				if wait > 0:
+					time.sleep(wait)
+			self.set(pin, level, start + t)
+
+	# Edges turning an encoder on pins a and b by detents (negative the other way) from where it is
+	#  interval: seconds per detent
+	def turn(self, a, b, detents, interval=0.05, steps_per_detent=4, start=0.0):
+		state = self.QUADRATURE.index((self.input(a) << 1) | self.input(b))
+		levels = {a: self.input(a), b: self.input(b)}
+		step = 1 if detents > 0 else -1
+		n = abs(detents) * steps_per_detent
+		edges = []
+		for i in range(n):
+			state = (state + step) % 4
+			new = self.QUADRATURE[state]
+			for pin, level in ((a, new >> 1), (b, new & 1)):
+				if levels[pin] != level:
+					levels[pin] = level
+					edges.append((start + (i + 1) * interval / steps_per_detent, pin, level))
+		return edges
+
+	# Edges of a press of the button on pin, with optional contact bounce
+	def press(self, pin, duration=0.1, start=0.0, bounce=0):
+		edges = []
+		for level, t in ((0, start), (1, start + duration)):
+			for i in range(bounce):
+				edges.append((t + i * 0.001, pin, level))
+				edges.append((t + i * 0.001 + 0.0005, pin, 1 - level))
+			edges.append((t + bounce * 0.001, pin, level))
+		return edges
+
+
+BACKENDS = {
+	'gpiod': Gpiod,
+	'rpi': RPiGPIO,
+	'sim': SimulatedGPIO,
+}
+
+
+# A backend by name ('gpiod', 'rpi' or 'sim'), an instance passed through,
+# or with None the first hardware backend that imports and opens its pins
+# RPi.GPIO raises RuntimeError off a Raspberry Pi.
+def open_backend(backend=None, **options):
+	if backend is None:
+		errors = []
+		for name in ('gpiod', 'rpi'):
+			try:
+				return BACKENDS[name](**options)
+			except (ImportError, OSError, RuntimeError) as e:
+				errors.append("%s: %s" % (name, e))
+		raise ImportError("No GPIO backend: " + "; ".join(errors))
+	if isinstance(backend, str):
+		return BACKENDS[backend](**options)
+	return backend
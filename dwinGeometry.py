@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# Geometry primitives for the T5UIC1, built from the native line, rectangle and point commands.
+# Every primitive is computed with NumPy in one pass and returns a list of commands:
+#   ('rect', color, xStart, yStart, xEnd, yEnd)   filled rectangle, 0x05 mode 1
+#   ('line', color, xStart, yStart, xEnd, yEnd)   0x03
+#   ('points', color, nx, ny, coords)             0x02, coords is an N x 2 array
+# draw() sends them in one batch, cost() counts the packets and bytes.
+#
+#   python3 dwinGeometry.py    runs the benchmark
+import sys
+import math
+import timeit
+
+import numpy as np
+
+from DWIN_Screen import T5UIC1_LCD, circle_offsets, circle_spans
+
+
+# Frame size of each command, header and tail included
+FRAME = 1 + len(T5UIC1_LCD.DWIN_BufTail)
+RECT_BYTES = FRAME + T5UIC1_LCD.DWIN_Packet[0x05].size
+LINE_BYTES = FRAME + T5UIC1_LCD.DWIN_Packet[0x03].size
+POINTS_BYTES = FRAME + T5UIC1_LCD.DWIN_Packet[0x02].size
+
+
+def draw(lcd, commands):
+	with lcd.Batch():
+		for command in commands:
+			kind = command[0]
+			if kind == 'rect':
+				lcd.Draw_Rectangle(1, *command[1:])
+			elif kind == 'line':
+				lcd.Draw_Line(*command[1:])
+			else:
+				lcd.DrawPoints(*command[1:])
+
+
+# (packets, bytes) the commands take on the UART
+def cost(commands):
+	packets = 0
+	total = 0
+	for command in commands:
+		kind = command[0]
+		if kind == 'rect':
+			packets += 1
+			total += RECT_BYTES
+		elif kind == 'line':
+			packets += 1
+			total += LINE_BYTES
+		else:
+			n = len(command[4])
+			chunks = -(-n // T5UIC1_LCD.DWIN_POINTS_MAX)
+			packets += chunks
+			total += chunks * POINTS_BYTES + 4 * n
+	return packets, total
+
+
+# Filled rectangles covering a boolean mask, placed with its top left pixel at (x, y)
+# Each row is split into runs, and runs with the same columns on consecutive rows merge into one rectangle.
+def mask_to_rects(mask, color, x=0, y=0):
+	mask = np.asarray(mask, bool)
+	if not mask.any():
+		return []
+	edges = np.diff(np.pad(mask, ((0, 0), (1, 1))).astype(np.int8), axis=1)
+	rows, starts = np.nonzero(edges == 1)
+	_, ends = np.nonzero(edges == -1)  # Same row order, one end per start
+	# Runs sorted by columns then row: a run continues the previous one when only the row advanced by one
+	order = np.lexsort((rows, ends, starts))
+	rows, starts, ends = rows[order], starts[order], ends[order]
+	new = np.ones(len(rows), bool)
+	new[1:] = (starts[1:] != starts[:-1]) | (ends[1:] != ends[:-1]) | (rows[1:] != rows[:-1] + 1)
+	first = np.nonzero(new)[0]
+	last = np.append(first[1:], len(rows)) - 1
+	return [
+		('rect', color, int(x + starts[i]), int(y + rows[i]), int(x + ends[i] - 1), int(y + rows[j]))
+		for i, j in zip(first, last)
+	]
+
+
+# Line segments through points, collinear segments in the same direction merged
+#  points: (x, y) sequence or N x 2 array
+#  closed: join the last point back to the first
+def polyline(points, color, closed=False):
+	p = np.rint(np.asarray(points, float)).astype(np.int64).reshape(-1, 2)
+	if closed:
+		p = np.vstack((p, p[:1]))
+	d = np.diff(p, axis=0)
+	keep = np.any(d != 0, axis=1)
+	if not keep.any():
+		return [('points', color, 1, 1, p[:1])] if len(p) else []
+	# Drop repeated points, then the vertices where the direction does not change
+	p = np.vstack((p[:1], p[1:][keep]))
+	d = np.diff(p, axis=0)
+	cross = d[1:, 0] * d[:-1, 1] - d[1:, 1] * d[:-1, 0]
+	dot = (d[1:] * d[:-1]).sum(axis=1)
+	corner = (cross != 0) | (dot <= 0)
+	vertices = np.vstack((p[:1], p[1:-1][corner], p[-1:]))
+	return [
+		('line', color, int(a[0]), int(a[1]), int(b[0]), int(b[1]))
+		for a, b in zip(vertices[:-1], vertices[1:])
+	]
+
+
+# Angle of (dx, dy) in degrees, 0 at 3 o'clock and clockwise on screen, inside [start, start + sweep]
+def in_sweep(dx, dy, start, sweep):
+	angle = np.degrees(np.arctan2(dy, dx))
+	return np.mod(angle - start, 360.0) <= sweep
+
+
+# One pixel arc of radius r around (cx, cy), as points
+#  start: angle in degrees, 0 at 3 o'clock, clockwise
+#  sweep: length of the arc in degrees
+def arc(cx, cy, r, start, sweep, color):
+	offsets = np.array(circle_offsets(int(r)))
+	offsets = offsets[in_sweep(offsets[:, 0], offsets[:, 1], start, sweep)]
+	return [('points', color, 1, 1, offsets + (int(cx), int(cy)))] if len(offsets) else []
+
+
+# Line width pixels thick
+# Axis aligned lines are one rectangle, others are parallel native lines stacked along the minor axis.
+def thick_line(xStart, yStart, xEnd, yEnd, width, color):
+	xStart, yStart, xEnd, yEnd = (int(round(v)) for v in (xStart, yStart, xEnd, yEnd))
+	width = max(int(width), 1)
+	lo = -(width // 2)
+	hi = lo + width - 1
+	if xStart == xEnd or yStart == yEnd or width == 1:
+		if width == 1:
+			return [('line', color, xStart, yStart, xEnd, yEnd)]
+		if yStart == yEnd:
+			return [('rect', color, min(xStart, xEnd), yStart + lo, max(xStart, xEnd), yStart + hi)]
+		return [('rect', color, xStart + lo, min(yStart, yEnd), xStart + hi, max(yStart, yEnd))]
+	dx = xEnd - xStart
+	dy = yEnd - yStart
+	# Thickness measured along the minor axis, so consecutive lines leave no gaps
+	n = max(int(math.ceil(width * math.hypot(dx, dy) / max(abs(dx), abs(dy)))), 1)
+	shifts = np.arange(n) - n // 2
+	if abs(dx) >= abs(dy):
+		return [('line', color, xStart, yStart + int(k), xEnd, yEnd + int(k)) for k in shifts]
+	return [('line', color, xStart + int(k), yStart, xEnd + int(k), yEnd) for k in shifts]
+
+
+# Rectangle with corners of radius r
+#  fill: filled with spans, otherwise four edges and four quarter circle outlines
+def rounded_rect(xStart, yStart, xEnd, yEnd, r, color, fill=True):
+	r = max(0, min(int(r), (xEnd - xStart) // 2, (yEnd - yStart) // 2))
+	if fill:
+		commands = []
+		top = []
+		bottom = []
+		# Rows above and below the center row of the corner circles, the middle rectangle has the rest
+		for dys, dye, w in circle_spans(r):
+			if dys < 0:
+				top.append(('rect', color, xStart + r - w, yStart + r + dys, xEnd - r + w, yStart + r + min(dye, -1)))
+			if dye > 0:
+				bottom.append(('rect', color, xStart + r - w, yEnd - r + max(dys, 1), xEnd - r + w, yEnd - r + dye))
+		commands += top
+		commands.append(('rect', color, xStart, yStart + r, xEnd, yEnd - r))
+		commands += bottom
+		return commands
+	commands = [
+		('line', color, xStart + r, yStart, xEnd - r, yStart),
+		('line', color, xStart + r, yEnd, xEnd - r, yEnd),
+		('line', color, xStart, yStart + r, xStart, yEnd - r),
+		('line', color, xEnd, yStart + r, xEnd, yEnd - r),
+	]
+	if r:
+		o = np.array(circle_offsets(r))
+		# Each quarter goes to its corner center
+		cx = np.where(o[:, 0] < 0, xStart + r, xEnd - r)
+		cy = np.where(o[:, 1] < 0, yStart + r, yEnd - r)
+		corner = (o[:, 0] != 0) & (o[:, 1] != 0)
+		commands.append(('points', color, 1, 1, np.column_stack((cx + o[:, 0], cy + o[:, 1]))[corner]))
+	return commands
+
+
+# Pixels of the ring between r - width and r around (0, 0), inside the sweep
+def ring_mask(r, width, start, sweep):
+	dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+	d2 = dx * dx + dy * dy
+	inner = max(r - width, 0)
+	return (d2 <= r * r + r) & (d2 > inner * inner + inner) & in_sweep(dx, dy, start, sweep)
+
+
+# Arc gauge: a track in bColor with the part up to value in color
+#  start/sweep: angles of the full scale in degrees, 0 at 3 o'clock, clockwise
+def gauge(cx, cy, r, width, value, vmin, vmax, color, bColor, start=135, sweep=270):
+	r = int(r)
+	frac = min(max((value - vmin) / float(vmax - vmin), 0.0), 1.0)
+	done = sweep * frac
+	commands = []
+	if done > 0:
+		commands += mask_to_rects(ring_mask(r, width, start, done), color, cx - r, cy - r)
+	if done < sweep:
+		track = ring_mask(r, width, start + done, sweep - done)
+		if done > 0:
+			track &= ~ring_mask(r, width, start, done)
+		commands += mask_to_rects(track, bColor, cx - r, cy - r)
+	return commands
+
+
+# Benchmark: commands and bytes of each primitive, against one 0x02 packet per pixel
+def benchmark():
+	W = T5UIC1_LCD.DWIN_WIDTH
+	H = T5UIC1_LCD.DWIN_HEIGHT
+	angle = np.linspace(0, 2 * np.pi, 13)
+	cases = [
+		('polyline, 12 segment star', lambda: polyline(np.column_stack((136 + 100 * np.cos(angle) * (1 + (np.arange(13) % 2)) / 2, 240 + 100 * np.sin(angle) * (1 + (np.arange(13) % 2)) / 2)), 0xFFFF)),
+		('polyline, 200 collinear points', lambda: polyline(np.column_stack((np.arange(200), np.arange(200))), 0xFFFF)),
+		('arc r=60, 270 deg', lambda: arc(136, 240, 60, 135, 270, 0xFFFF)),
+		('thick line 5px diagonal', lambda: thick_line(10, 10, 260, 300, 5, 0xFFFF)),
+		('thick line 8px horizontal', lambda: thick_line(10, 100, 260, 100, 8, 0xFFFF)),
+		('rounded rect 200x80 r=12 filled', lambda: rounded_rect(36, 200, 236, 280, 12, 0xFFFF)),
+		('rounded rect 200x80 r=12 outline', lambda: rounded_rect(36, 200, 236, 280, 12, 0xFFFF, False)),
+		('gauge r=50 w=10 at 65%', lambda: gauge(136, 240, 50, 10, 65, 0, 100, 0xFFFF, 0x3A6A)),
+	]
+	print("%-34s %8s %8s %10s %10s %9s" % ('primitive', 'packets', 'bytes', 'pixels', 'naive B', 'compute'))
+	for name, make in cases:
+		commands = make()
+		packets, total = cost(commands)
+		# Pixels drawn, for the one point packet per pixel baseline
+		mask = np.zeros((H + 64, W + 64), bool)
+		for command in commands:
+			if command[0] == 'points':
+				c = command[4]
+				mask[c[:, 1], c[:, 0]] = True
+			elif command[0] == 'rect':
+				mask[command[3]:command[5] + 1, command[2]:command[4] + 1] = True
+			else:
+				_, _, xs, ys, xe, ye = command
+				n = max(abs(xe - xs), abs(ye - ys)) + 1
+				mask[np.rint(np.linspace(ys, ye, n)).astype(int), np.rint(np.linspace(xs, xe, n)).astype(int)] = True
+		pixels = int(mask.sum())
+		seconds = min(timeit.repeat(make, number=20, repeat=3)) / 20
+		print("%-34s %8d %8d %10d %10d %7.2fms" % (name, packets, total, pixels, pixels * (POINTS_BYTES + 4), seconds * 1e3))
+
+
+if __name__ == '__main__':
+	sys.exit(benchmark())
@@ -0,0 +1,114 @@
+# Input events between the GPIO callbacks and the HMI
+# The encoder, button and timer callbacks only post a timestamped event, which is an append to a
+# deque and an Event.set(). One UI thread drains the queue, coalesces what piled up while the
+# last handler ran, and calls the handler, so the HMI never runs on the GPIO or timer threads.
+import time
+import threading
+import traceback
+from collections import deque, namedtuple
+
+
+DWIN_InputEvent = namedtuple('DWIN_InputEvent', 'kind value time')
+
+TURN = 'turn'  # value: detents, negative for clockwise (ENCODER_DIFF_CW in the HMI)
+ENTER = 'enter'  # value: unused
+TICK = 'tick'  # value: unused
+ATTACHED = 'attached'  # value: unused, a missing panel answered
+THUMBNAIL = 'thumbnail'  # value: (file name, picture slot, size) of a thumbnail ready on the panel
+
+
+class DWIN_InputQueue:
+
+	#  handler(event): called from the UI thread for each coalesced event
+	#  max_events: events held before new ones are dropped
+	def __init__(self, handler, max_events=64):
+		self.handler = handler
+		self.max_events = max_events
+		self.events = deque()
+		self.ready = threading.Event()
+		self.running = False
+		self.thread = None
+		self.posted = 0
+		self.dropped = 0
+		self.coalesced = 0
+		self.handled = 0
+		self.errors = 0
+		self.latency_last = 0.0  # Seconds from the oldest coalesced event (its edge) to its handler
+		self.latency_max = 0.0
+		self.latency_total = 0.0
+
+	# Queue an event, safe to call from any thread
+	#  when: time.monotonic() based time of the edge behind the event, now by default
+	def post(self, kind, value=0, when=None):
+		if len(self.events) >= self.max_events:
+			self.dropped += 1
+			return False
+		self.events.append(DWIN_InputEvent(kind, value, time.monotonic() if when is None else when))
+		self.posted += 1
+		self.ready.set()
+		return True
+
+	def start(self):
+		if self.thread is not None:
+			return
+		self.running = True
+		self.thread = threading.Thread(target=self.run, name='DWIN_UI', daemon=True)
+		self.thread.start()
+
+	def stop(self, timeout=1.0):
+		self.running = False
+		self.ready.set()
+		if self.thread is not None and self.thread is not threading.current_thread():
+			self.thread.join(timeout)
+		self.thread = None
+
+	def run(self):
+		while self.running:
+			self.ready.wait()
+			self.ready.clear()
+			for event in self.drain():
+				if not self.running:
+					break
+				self.dispatch(event)
+
+	# Everything queued, with consecutive turns summed into one and repeated ticks merged
+	# A coalesced event keeps the time of its oldest part, so the latency covers the wait.
+	def drain(self):
+		events = []
+		while True:
+			try:
+				event = self.events.popleft()
+			except IndexError:
+				break
+			last = events[-1] if events else None
+			if last is not None and last.kind == event.kind and event.kind in (TURN, TICK):
+				events[-1] = last._replace(value=last.value + event.value)
+				self.coalesced += 1
+			else:
+				events.append(event)
+		return [event for event in events if event.kind != TURN or event.value]
+
+	def dispatch(self, event):
+		latency = time.monotonic() - event.time
+		self.latency_last = latency
+		self.latency_max = max(self.latency_max, latency)
+		self.latency_total += latency
+		self.handled += 1
+		try:
+			self.handler(event)
+		except Exception:
+			self.errors += 1
+			traceback.print_exc()
+
+	def stats(self):
+		return {
+			'posted': self.posted,
+			'dropped': self.dropped,
+			'coalesced': self.coalesced,
+			'handled': self.handled,
+			'errors': self.errors,
+			'pending': len(self.events),
+			'latency_last': self.latency_last,
+			'latency_max': self.latency_max,
+			'latency_mean': self.latency_total / self.handled if self.handled else 0.0,
+		}
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Play a DWIN traffic log back into a serial port or a pty.
+# Record a log with lcd_options={'record': '/tmp/session.dwinlog'} (or lcd.Record(path)), then:
+#
+#   python3 dwinReplay.py /tmp/session.dwinlog /dev/ttyAMA0
+#   python3 dwinReplay.py /tmp/session.dwinlog /dev/ttyAMA0 --speed 0
+#   python3 dwinReplay.py /tmp/session.dwinlog pty
+#
+# --speed 1 keeps the recorded timing, 2 plays twice as fast and 0 writes as fast as the UART goes.
+# With pty a pseudo terminal is opened and its name printed, so an emulator or a logic
+# analyzer script can attach to it before the replay starts.
+import os
+import sys
+import time
+import argparse
+
+import serial
+
+from DWIN_Screen import DWIN_Recorder
+
+
+def open_port(name, baudrate):
+	if name == 'pty':
+		master, slave = os.openpty()
+		print("Replaying into", os.ttyname(slave))
+		input("Attach to it and press Enter to start ")
+		return os.fdopen(master, 'wb', buffering=0)
+	return serial.Serial(name, baudrate, timeout=1)
+
+
+# Write every frame of the log to port
+# Returns (frames, bytes, seconds)
+def replay(path, port, speed=1.0):
+	frames = 0
+	total = 0
+	first = None
+	start = time.monotonic()
+	for t, frame in DWIN_Recorder.read(path):
+		if first is None:
+			first = t
+		if speed > 0:
+			wait = start + (t - first) * 1e-9 / speed - time.monotonic()
+			if wait > 0:
+				time.sleep(wait)
+		port.write(frame)
+		frames += 1
+		total += len(frame)
+	port.flush()
+	return frames, total, time.monotonic() - start
+
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(description="Replay a DWIN T5UIC1 traffic log")
+	parser.add_argument('log', help="log written by T5UIC1_LCD.Record()")
+	parser.add_argument('port', help="serial port, or pty to open a pseudo terminal")
+	parser.add_argument('--speed', type=float, default=1.0, help="time scale, 0 for as fast as possible (default 1)")
+	parser.add_argument('--baudrate', type=int, default=115200)
+	parser.add_argument('--loop', type=int, default=1, help="number of times to play the log")
+	args = parser.parse_args(argv)
+
+	port = open_port(args.port, args.baudrate)
+	try:
+		for i in range(args.loop):
+			frames, total, seconds = replay(args.log, port, args.speed)
+			print("%d frames, %d bytes in %.3f s" % (frames, total, seconds))
+	finally:
+		port.close()
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main())
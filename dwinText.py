@@ -0,0 +1,117 @@
+# Text layout for the T5UIC1 fonts
+# The panel fonts are fixed width, so a string is len(text) character cells wide. Alignment,
+# truncation with an ellipsis and word wrapping are computed here once per (font, text, box)
+# and memoized, and every coordinate returned is an integer.
+#
+# Boxes are (xStart, yStart, xEnd, yEnd), inclusive like the rectangle commands.
+from functools import lru_cache
+
+from DWIN_Screen import T5UIC1_LCD
+
+
+LEFT = 'left'
+CENTER = 'center'
+RIGHT = 'right'
+TOP = 'top'
+MIDDLE = 'middle'
+BOTTOM = 'bottom'
+
+ELLIPSIS = '...'
+
+
+# Character cell (width, height) of a font size
+def char_size(font):
+	return T5UIC1_LCD.DWIN_FONT_SIZES[min(font & 0x0F, 9)]
+
+
+def text_width(font, text):
+	return len(text) * char_size(font)[0]
+
+
+# Number of characters of font that fit in width pixels
+def max_chars(font, width):
+	return max(int(width) // char_size(font)[0], 0)
+
+
+# text cut down to width pixels, the end replaced by the ellipsis when it does not fit
+@lru_cache(maxsize=512)
+def fit(font, text, width, ellipsis=ELLIPSIS):
+	n = max_chars(font, width)
+	if len(text) <= n:
+		return text
+	if n <= len(ellipsis):
+		return text[:n]
+	return text[:n - len(ellipsis)].rstrip() + ellipsis
+
+
+# Lines of text wrapped at spaces to width pixels, words longer than a line are broken
+#  lines: maximum number of lines, 0 for no limit; the last line ends with the ellipsis when text is cut
+@lru_cache(maxsize=256)
+def wrap(font, text, width, lines=0, ellipsis=ELLIPSIS):
+	n = max_chars(font, width)
+	if n == 0:
+		return ()
+	out = []
+	for paragraph in text.split('\n'):
+		line = ''
+		for word in paragraph.split():
+			while len(word) > n:
+				if line:
+					out.append(line)
+					line = ''
+				out.append(word[:n])
+				word = word[n:]
+			if not line:
+				line = word
+			elif len(line) + 1 + len(word) <= n:
+				line += ' ' + word
+			else:
+				out.append(line)
+				line = word
+		out.append(line)
+	if lines and len(out) > lines:
+		out = out[:lines]
+		out[-1] = fit(font, out[-1] + ellipsis, width, ellipsis)
+	return tuple(out)
+
+
+# Offset of a block of size inside space, never negative
+def offset(space, size, align):
+	if align in (CENTER, MIDDLE):
+		return max(space - size, 0) // 2
+	if align in (RIGHT, BOTTOM):
+		return max(space - size, 0)
+	return 0
+
+
+# Lines of text placed in box
+#  align: LEFT, CENTER or RIGHT
+#  valign: TOP, MIDDLE or BOTTOM
+#  multiline: wrap to as many lines as the box height holds, otherwise a single line
+# Returns a tuple of (x, y, line)
+@lru_cache(maxsize=256)
+def layout(font, text, box, align=LEFT, valign=TOP, multiline=False, ellipsis=ELLIPSIS):
+	xStart, yStart, xEnd, yEnd = box
+	width = xEnd - xStart + 1
+	height = yEnd - yStart + 1
+	cw, ch = char_size(font)
+	if multiline:
+		lines = wrap(font, text, width, max(height // ch, 1), ellipsis)
+	else:
+		lines = (fit(font, text, width, ellipsis),)
+	y = yStart + offset(height, len(lines) * ch, valign)
+	return tuple(
+		(xStart + offset(width, len(line) * cw, align), y + i * ch, line)
+		for i, line in enumerate(lines)
+	)
+
+
+# Draw text laid out in box, the other arguments are those of Draw_String
+def draw(lcd, bShow, font, color, bColor, box, text, align=LEFT, valign=TOP, multiline=False):
+	for x, y, line in layout(font, text, tuple(box), align, valign, multiline):
+		lcd.Draw_String(False, bShow, font, color, bColor, x, y, line)
+
+
+# Hits and misses of the layout caches
+def cache_info():
+	return {'fit': fit.cache_info(), 'wrap': wrap.cache_info(), 'layout': layout.cache_info()}
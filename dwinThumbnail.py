@@ -0,0 +1,145 @@
+# Slicer thumbnails for the print screen
+# Thumbnails are read from the Moonraker file metadata, decoded, resized and re-encoded as
+# panel JPGs in a worker process, then uploaded to a picture slot of the panel with the memory
+# commands. An index of the slot contents by content hash, kept on disk, makes sure a thumbnail
+# already stored on the panel is never uploaded again. Everything runs off the UI thread and the
+# callback is called once the thumbnail is in its slot.
+import io
+import os
+import json
+import time
+import hashlib
+import posixpath
+from urllib.parse import quote
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# Worker process: slicer PNG to a full screen panel JPG with the thumbnail in its top left corner
+# Colors are cut down to RGB565 first, the encoder then spends nothing on bits the panel can't show.
+def render_thumbnail(png, size, screen, max_bytes):
+	from PIL import Image
+
+	image = Image.open(io.BytesIO(png)).convert('RGB')
+	image.thumbnail(size, Image.LANCZOS)
+	image = Image.merge('RGB', [
+		channel.point(lambda v, mask=mask: v & mask)
+		for channel, mask in zip(image.split(), (0xF8, 0xFC, 0xF8))
+	])
+	canvas = Image.new('RGB', screen)
+	canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2))
+	for quality in (90, 80, 65, 50):
+		out = io.BytesIO()
+		canvas.save(out, 'JPEG', quality=quality, progressive=False, subsampling=0)
+		if out.tell() <= max_bytes:
+			break
+	return out.getvalue()
+
+
+class DWIN_Thumbnails:
+	#  lcd: T5UIC1_LCD
+	#  pd: PrinterData, for the Moonraker connection
+	#  slots: picture memory slots the thumbnails may use
+	#  size: thumbnail (width, height) on screen
+	#  cache_dir: where the slot index and the rendered JPGs are kept
+	def __init__(self, lcd, pd, slots=range(10, 16), size=(64, 64), cache_dir='~/.cache/DWIN_T5UIC1_LCD'):
+		self.lcd = lcd
+		self.pd = pd
+		self.slots = list(slots)
+		self.size = tuple(size)
+		self.cache_dir = os.path.expanduser(cache_dir)
+		os.makedirs(self.cache_dir, exist_ok=True)
+		self.index_path = os.path.join(self.cache_dir, 'thumbnails.json')
+		self.index = self.load_index()  # slot: {'hash': content hash, 'used': last use}
+		self.known = {}  # file name: content hash, saves the download on the next show
+		self.worker = ThreadPoolExecutor(1, 'DWIN_Thumbnails')
+		self.renderer = None  # Process pool, started on the first thumbnail to render
+		self.uploads = 0
+
+	def load_index(self):
+		try:
+			with open(self.index_path) as f:
+				return {int(slot): entry for slot, entry in json.load(f).items() if int(slot) in self.slots}
+		except (OSError, ValueError):
+			return {}
+
+	def save_index(self):
+		tmp = self.index_path + '.tmp'
+		with open(tmp, 'w') as f:
+			json.dump(self.index, f)
+		os.replace(tmp, self.index_path)
+
+	# Get the thumbnail of a file into a picture slot in the background
+	#  callback(filename, slot, size) is called from the worker thread once it is there, it should
+	#  hand the drawing over to the UI thread
+	def request(self, filename, callback):
+		self.worker.submit(self.load, filename, callback)
+
+	def load(self, filename, callback):
+		try:
+			slot = self.prepare(filename)
+		except Exception as e:
+			print("Thumbnail for", filename, "failed:", e)
+			return
+		if slot is not None:
+			callback(filename, slot, self.size)
+
+	# Picture slot holding the thumbnail of filename, None when the file has none
+	def prepare(self, filename):
+		digest = self.known.get(filename)
+		slot = self.find(digest)
+		if slot is None:
+			png = self.fetch(filename)
+			if png is None:
+				return None
+			digest = hashlib.sha1(png + repr(self.size).encode()).hexdigest()
+			self.known[filename] = digest
+			slot = self.find(digest)
+			if slot is None:
+				slot = self.store(digest, png)
+				if slot is None:
+					return None
+		self.index[slot]['used'] = time.time()
+		self.save_index()
+		return slot
+
+	def find(self, digest):
+		for slot, entry in self.index.items():
+			if entry['hash'] == digest:
+				return slot
+		return None
+
+	# Slicer PNG of the smallest thumbnail at least as big as self.size, or the largest one
+	def fetch(self, filename):
+		meta = self.pd.getREST('/server/files/metadata?filename=' + quote(filename))
+		thumbs = (meta or {}).get('result', {}).get('thumbnails') or []
+		if not thumbs:
+			return None
+		big = [t for t in thumbs if t['width'] >= self.size[0] and t['height'] >= self.size[1]]
+		thumb = min(big, key=lambda t: t['width']) if big else max(thumbs, key=lambda t: t['width'])
+		path = posixpath.join(posixpath.dirname(filename), thumb['relative_path'])
+		r = self.pd.op.s.get(self.pd.op.base_address + '/server/files/gcodes/' + quote(path))
+		r.raise_for_status()
+		return r.content
+
+	# Render and upload into the least recently used slot
+	def store(self, digest, png):
+		path = os.path.join(self.cache_dir, digest + '.jpg')
+		try:
+			with open(path, 'rb') as f:
+				jpg = f.read()
+		except OSError:
+			if self.renderer is None:
+				self.renderer = ProcessPoolExecutor(1)
+			screen = (self.lcd.DWIN_WIDTH, self.lcd.DWIN_HEIGHT)
+			jpg = self.renderer.submit(render_thumbnail, png, self.size, screen, self.lcd.DWIN_SRAM_SIZE).result()
+			with open(path, 'wb') as f:
+				f.write(jpg)
+		free = [slot for slot in self.slots if slot not in self.index]
+		slot = free[0] if free else min(self.index, key=lambda s: self.index[s]['used'])
+		self.index.pop(slot, None)
+		self.save_index()  # The slot content is unknown until the upload is done
+		if not self.lcd.JPG_Upload(slot, jpg):
+			return None
+		self.uploads += 1
+		self.index[slot] = {'hash': digest, 'used': time.time()}
+		return slot
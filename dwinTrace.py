@@ -0,0 +1,214 @@
+# End to end latency of the input events
+# Every turn or press the UI thread handles gets a span, timed from the GPIO edge that started it:
+#   queue    edge to the handler starting
+#   printer  time spent in PrinterData calls made by the handler
+#   handler  edge to the handler returning
+#   uart     edge to the last byte of the frames it drew leaving the UART
+#   total    edge to whichever of handler and uart came last
+# Spans are grouped by the screen (checkkey) the input arrived on, and the p50/p95/p99 and a
+# histogram of each stage are published as JSON to a file or a UDP socket every interval seconds.
+#
+# Nothing is traced without a DWIN_Tracer: the hooks in the HMI and the screen are then a None check.
+import os
+import json
+import time
+import socket
+import inspect
+import threading
+from bisect import bisect_left
+from collections import deque
+from functools import partial
+
+
+STAGES = ('queue', 'printer', 'handler', 'uart', 'total')
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)  # Histogram upper bounds in ms, the last bucket is above
+
+
+class DWIN_Span:
+	__slots__ = ('screen', 'kind', 'edge', 'start', 'end', 'uart', 'printer', 'calls', 'depth', 'pending', 'thread')
+
+	def __init__(self, screen, kind, edge):
+		self.screen = screen
+		self.kind = kind
+		self.edge = edge
+		self.start = time.monotonic()
+		self.end = 0.0
+		self.uart = 0.0
+		self.printer = 0.0
+		self.calls = 0
+		self.depth = 0
+		self.pending = 0  # Writes made by the handler that have not left the UART yet
+		self.thread = threading.get_ident()
+
+
+# Nearest rank percentile of sorted values
+def percentile(values, p):
+	return values[min(max(-(-len(values) * p // 100) - 1, 0), len(values) - 1)]
+
+
+class DWIN_Tracer:
+
+	#  target: JSON file to rewrite, or 'udp://host:port' to send a datagram to
+	#  interval: seconds between reports
+	#  samples: latest spans per screen the percentiles are computed over
+	#  names: screen names by checkkey for the report
+	def __init__(self, target, interval=10.0, samples=1024, names=None):
+		self.target = target
+		self.address = None
+		self.sock = None
+		if target.startswith('udp://'):
+			host, port = target[6:].rsplit(':', 1)
+			self.address = (host, int(port))
+			self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+		self.interval = interval
+		self.samples = samples
+		self.names = names or {}
+		self.current = None  # Span of the event the UI thread is handling
+		self.lock = threading.Lock()
+		self.screens = {}  # screen: {stage: (deque of recent ms, bucket counts)}
+		self.spans = 0
+		self.dropped = 0  # Writes discarded before reaching the UART
+		self.stopped = threading.Event()
+		self.thread = None
+
+	# UI thread: an event from an edge at time edge is being handled on screen
+	def begin(self, screen, kind, edge):
+		span = DWIN_Span(screen, kind, edge)
+		self.current = span
+		return span
+
+	# UI thread: the handler returned, the span ends when its last write is out
+	def end(self, span):
+		span.end = time.monotonic()
+		self.current = None
+		with self.lock:
+			if not span.pending:
+				self.finish(span)
+
+	# Callback for T5UIC1_LCD.Write() to call with the time the last byte left the UART,
+	# or None when the write was dropped; None outside of a span
+	def written(self):
+		span = self.current
+		if span is None:
+			return None
+		with self.lock:
+			span.pending += 1
+		return partial(self.sent, span)
+
+	def sent(self, span, when):
+		with self.lock:
+			span.pending -= 1
+			if when is None:
+				self.dropped += 1
+			elif when > span.uart:
+				span.uart = when
+			if span.end and not span.pending:
+				self.finish(span)
+
+	# Lock held
+	def finish(self, span):
+		stages = self.screens.get(span.screen)
+		if stages is None:
+			stages = self.screens[span.screen] = {
+				stage: (deque(maxlen=self.samples), [0] * (len(BUCKETS) + 1)) for stage in STAGES
+			}
+		times = {
+			'queue': span.start - span.edge,
+			'printer': span.printer,
+			'handler': span.end - span.edge,
+			'total': max(span.end, span.uart) - span.edge,
+		}
+		if span.uart:
+			times['uart'] = span.uart - span.edge
+		for stage, seconds in times.items():
+			ms = seconds * 1000.0
+			recent, counts = stages[stage]
+			recent.append(ms)
+			counts[bisect_left(BUCKETS, ms)] += 1
+		self.spans += 1
+
+	# Wrap the public methods of obj, e.g. the PrinterData, to time the calls the handlers make
+	# Calls from other threads, and from inside another timed call, pass straight through.
+	def instrument(self, obj):
+		for name, value in vars(type(obj)).items():
+			if not name.startswith('_') and inspect.isfunction(value):
+				setattr(obj, name, self.timed(getattr(obj, name)))
+
+	def timed(self, method):
+		def call(*args, **kwargs):
+			span = self.current
+			if span is None or span.depth or span.thread != threading.get_ident():
+				return method(*args, **kwargs)
+			span.depth += 1
+			start = time.monotonic()
+			try:
+				return method(*args, **kwargs)
+			finally:
+				span.printer += time.monotonic() - start
+				span.calls += 1
+				span.depth -= 1
+		return call
+
+	# Percentiles and histograms in ms of every stage, by screen
+	def report(self):
+		screens = {}
+		with self.lock:
+			for screen, stages in self.screens.items():
+				out = {}
+				for stage, (recent, counts) in stages.items():
+					if not recent:
+						continue
+					values = sorted(recent)
+					out[stage] = {
+						'count': sum(counts),
+						'p50': percentile(values, 50),
+						'p95': percentile(values, 95),
+						'p99': percentile(values, 99),
+						'max': values[-1],
+						'histogram': list(counts),
+					}
+				screens[self.names.get(screen, str(screen))] = out
+			spans = self.spans
+			dropped = self.dropped
+		return {
+			'time': time.time(),
+			'spans': spans,
+			'dropped_writes': dropped,
+			'buckets_ms': list(BUCKETS),
+			'screens': screens,
+		}
+
+	def publish(self):
+		data = json.dumps(self.report(), indent=None if self.sock else 1)
+		try:
+			if self.sock:
+				self.sock.sendto(data.encode(), self.address)
+			else:
+				tmp = self.target + '.tmp'
+				with open(tmp, 'w') as f:
+					f.write(data)
+				os.replace(tmp, self.target)
+		except OSError as e:
+			print("DWIN trace not published:", e)
+
+	def start(self):
+		if self.thread is not None:
+			return
+		self.stopped.clear()
+		self.thread = threading.Thread(target=self.run, name='DWIN_Trace', daemon=True)
+		self.thread.start()
+
+	def run(self):
+		while not self.stopped.wait(self.interval):
+			self.publish()
+
+	# Stop publishing, with a last report
+	def close(self):
+		self.stopped.set()
+		if self.thread is not None:
+			self.thread.join()
+			self.thread = None
+		self.publish()
+		if self.sock:
+			self.sock.close()
+			self.sock = None
@@ -2,11 +2,15 @@ import time
 import multitimer
 import atexit
 
-from encoder import Encoder
-from RPi import GPIO
+from encoder import Encoder, Acceleration, Button
+import dwinGPIO
 
 from printerInterface import PrinterData
 from DWIN_Screen import T5UIC1_LCD
+from dwinThumbnail import DWIN_Thumbnails
+from dwinInput import DWIN_InputQueue, TURN, ENTER, TICK, ATTACHED, THUMBNAIL
+from dwinTrace import DWIN_Tracer
+import dwinText
 
 
 def current_milli_time():
@@ -136,15 +140,35 @@ class DWIN_LCD:
 	Print_window = 33
 	Popup_Window = 34
 
+	# checkkey names, for the latency reports
+	SCREENS = (
+		'MainMenu', 'SelectFile', 'Prepare', 'Control', 'Leveling', 'PrintProcess', 'AxisMove', 'TemperatureID',
+		'Motion', 'Info', 'Tune', 'PLAPreheat', 'ABSPreheat', 'MaxSpeed', 'MaxSpeed_value', 'MaxAcceleration',
+		'MaxAcceleration_value', 'MaxJerk', 'MaxJerk_value', 'Step', 'Step_value', 'Last_Prepare', 'Back_Main',
+		'Back_Print', 'Move_X', 'Move_Y', 'Move_Z', 'Extruder', 'ETemp', 'Homeoffset', 'BedTemp', 'FanSpeed',
+		'PrintSpeed', 'Print_window', 'Popup_Window',
+	)
+
 	MINUNITMULT = 10
 
 	ENCODER_DIFF_NO = 0  # no state
 	ENCODER_DIFF_CW = 1  # clockwise rotation
 	ENCODER_DIFF_CCW = 2  # counterclockwise rotation
 	ENCODER_DIFF_ENTER = 3   # click
-	ENCODER_WAIT = 80
-	ENCODER_WAIT_ENTER = 300
-	EncoderRateLimit = True
+
+	# Value editors speed up with the turning speed: (min, max) change per detent in the units
+	# of the edited value, so 0.1 mm for the axes and 0.01 mm for the z offset.
+	# All the detents queued while a handler ran are applied in one call.
+	ENCODER_ACCELERATION = {
+		Move_X: Acceleration(1, 100),
+		Move_Y: Acceleration(1, 100),
+		Move_Z: Acceleration(1, 20),
+		Extruder: Acceleration(1, 20),
+		ETemp: Acceleration(1, 10),
+		BedTemp: Acceleration(1, 5),
+		PrintSpeed: Acceleration(1, 10),
+		Homeoffset: Acceleration(1, 5, shape=3.0),
+	}
 
 
 	dwin_zoffset = 0.0
@@ -255,9 +279,24 @@ class DWIN_LCD:
 	ICON_Info_0 = 90
 	ICON_Info_1 = 91
 
+	# Sizes of the menu icons, those of their selection frames
+	ICON_SIZES = {
+		ICON_Print_0: (110, 100), ICON_Print_1: (110, 100), ICON_Prepare_0: (110, 100), ICON_Prepare_1: (110, 100),
+		ICON_Control_0: (110, 100), ICON_Control_1: (110, 100), ICON_Leveling_0: (110, 100), ICON_Leveling_1: (110, 100),
+		ICON_Info_0: (110, 100), ICON_Info_1: (110, 100),
+		ICON_Setup_0: (80, 100), ICON_Setup_1: (80, 100), ICON_Pause_0: (80, 100), ICON_Pause_1: (80, 100),
+		ICON_Continue_0: (80, 100), ICON_Continue_1: (80, 100), ICON_Stop_0: (80, 100), ICON_Stop_1: (80, 100),
+	}
+
 	MENU_CHAR_LIMIT = 24
 	STATUS_Y = 360
 
+	# Print screen thumbnail, copied from a virtual display area below the progress bar
+	THUMB_X = 16
+	THUMB_Y = 120
+	THUMB_SIZE = 64
+	THUMB_AREA = 2
+
 	MOTION_CASE_RATE = 1
 	MOTION_CASE_ACCEL = 2
 	MOTION_CASE_JERK = MOTION_CASE_ACCEL + 0
@@ -302,22 +341,37 @@ class DWIN_LCD:
 	# Dwen serial screen initialization
 	# Passing parameters: serial port number
 	# DWIN screen uses serial port 1 to send
-	def __init__(self, USARTx, encoder_pins, button_pin, octoPrint_API_Key):
-		GPIO.setmode(GPIO.BCM)
-		self.encoder = Encoder(encoder_pins[0], encoder_pins[1])
+	# lcd_options: extra T5UIC1_LCD settings, e.g. {'async_write': True, 'low_latency': True}
+	# gpio: dwinGPIO backend for the encoder and button, 'gpiod', 'rpi' or 'sim'; the first available by default
+	# trace: publish the input latency of each screen to this JSON file or 'udp://host:port', see dwinTrace
+	def __init__(self, USARTx, encoder_pins, button_pin, octoPrint_API_Key, lcd_options=None, gpio=None, trace=None):
+		# GPIO callbacks and the timer only queue events, the UI thread handles them
+		self.input = DWIN_InputQueue(self.HMI_Event)
+		self.trace = None
+		if trace:
+			self.trace = DWIN_Tracer(trace, names={getattr(self, name): name for name in self.SCREENS})
+		self.EncoderPending = 0  # Detents queued for the handlers, negative is clockwise
+		self.EncoderEnter = False
+		self.EncoderStep = 1  # Value change of the detent get_encoder_state() returned
+		self.EncodePosted = 0
+		self.gpio = dwinGPIO.open_backend(gpio, pins=(encoder_pins[0], encoder_pins[1], button_pin))
+		self.encoder = Encoder(encoder_pins[0], encoder_pins[1], gpio=self.gpio)
 		self.button_pin = button_pin
-		GPIO.setup(self.button_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-		GPIO.add_event_detect(self.button_pin, GPIO.BOTH, callback=self.encoder_has_data)
-		self.encoder.callback = self.encoder_has_data
-		self.EncodeLast = 0
-		self.EncodeMS = current_milli_time() + self.ENCODER_WAIT
-		self.EncodeEnter = current_milli_time() + self.ENCODER_WAIT_ENTER
+		# Only presses wake the HMI, the second press of a double click is not one
+		self.button = Button(self.button_pin, self.HMI_ButtonPressed, gpio=self.gpio)
+		self.encoder.callback = self.HMI_EncoderMoved
 		self.next_rts_update_ms = 0
 		self.last_cardpercentValue = 101
-		self.lcd = T5UIC1_LCD(USARTx)
+		self.lcd = T5UIC1_LCD(USARTx, on_attach=self.HMI_PanelAttached, **(lcd_options or {}))
+		self.lcd.SetIconSizes(self.ICON, self.ICON_SIZES)
 		self.checkkey = self.MainMenu
 		self.pd = PrinterData(octoPrint_API_Key)
-		self.timer = multitimer.MultiTimer(interval=2, function=self.EachMomentUpdate)
+		self.thumbnails = DWIN_Thumbnails(self.lcd, self.pd, size=(self.THUMB_SIZE, self.THUMB_SIZE))
+		if self.trace is not None:
+			self.lcd.tracer = self.trace
+			self.trace.instrument(self.pd)
+			self.trace.start()
+		self.timer = multitimer.MultiTimer(interval=2, function=self.input.post, kwargs={'kind': TICK})
 		self.HMI_ShowBoot()
 		print("Boot looks good")
 		print("Testing Web-services")
@@ -327,15 +381,35 @@ class DWIN_LCD:
 			self.pd.init_Webservices()
 			self.HMI_ShowBoot("Web-service still loading")
 		self.HMI_Init()
-		self.HMI_StartFrame(False)
+		with self.lcd.Batch():
+			self.HMI_StartFrame(False)
+		self.input.start()
+
+	# Prober thread: a panel plugged in after start, or that was slow to boot, gets the current screen
+	# The event waits in the queue until the UI thread starts, once the first screen is drawn.
+	def HMI_PanelAttached(self, lcd):
+		self.input.post(ATTACHED)
+
+	# UI thread: draw the current screen again on a panel that just answered
+	def HMI_PanelRedraw(self):
+		with self.lcd.Batch():
+			self.HMI_SetLanguageCache()
+			self.HMI_StartFrame(True)
+			self.lcd.UpdateLCD()
 
 	def lcdExit(self):
 		print("Shutting down the LCD")
-		self.lcd.JPG_ShowAndCache(0)
-		self.lcd.Frame_SetDir(1)
-		self.lcd.UpdateLCD()
+		with self.lcd.Batch():
+			self.lcd.JPG_ShowAndCache(0)
+			self.lcd.Frame_SetDir(1)
+			self.lcd.UpdateLCD()
 		self.timer.stop()
-		GPIO.remove_event_detect(self.button_pin)
+		self.input.stop()
+		self.button.close()
+		self.encoder.close()
+		if self.trace is not None:
+			self.trace.close()
+		self.lcd.close()
 
 	def MBASE(self, L):
 		return 49 + self.MLINE * L
@@ -348,16 +422,16 @@ class DWIN_LCD:
 
 	def HMI_ShowBoot(self, mesg=None):
 		if mesg:
-			self.lcd.Draw_String(
-				False, False, self.lcd.DWIN_FONT_STAT,
+			dwinText.draw(
+				self.lcd, False, self.lcd.DWIN_FONT_STAT,
 				self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				10, 50,
-				mesg
+				(10, 50, self.lcd.DWIN_WIDTH - 11, 89), mesg, multiline=True
 			)
 		for t in range(0, 100, 2):
-			self.lcd.ICON_Show(self.ICON, self.ICON_Bar, 15, 260)
-			self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Black, 15 + t * 242 / 100, 260, 257, 280)
-			self.lcd.UpdateLCD()
+			with self.lcd.Batch():
+				self.lcd.ICON_Show(self.ICON, self.ICON_Bar, 15, 260)
+				self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Black, 15 + t * 242 / 100, 260, 257, 280)
+				self.lcd.UpdateLCD()
 			time.sleep(.020)
 
 	def HMI_Init(self):
@@ -547,21 +621,12 @@ class DWIN_LCD:
 				self.checkkey = self.AxisMove
 				self.select_axis.reset()
 				self.Draw_Move_Menu()
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-					3, 1, 216, self.MBASE(1), self.pd.current_position.x * self.MINUNITMULT
-				)
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-					3, 1, 216, self.MBASE(2), self.pd.current_position.y * self.MINUNITMULT
-				)
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-					3, 1, 216, self.MBASE(3), self.pd.current_position.z * self.MINUNITMULT
-				)
+				self.Axis_Field(1).Draw(self.pd.current_position.x)
+				self.Axis_Field(2).Draw(self.pd.current_position.y)
+				self.Axis_Field(3).Draw(self.pd.current_position.z)
 				self.pd.sendGCode("G92 E0")
 				self.pd.current_position.e = self.pd.HMI_ValueStruct.Move_E_scale = 0
-				self.lcd.Draw_Signed_Float(self.lcd.font8x16, self.lcd.Color_Bg_Black, 3, 1, 216, self.MBASE(4), 0)
+				self.Axis_Field(4).DrawScaled(0)
 			elif self.select_prepare.now == self.PREPARE_CASE_DISA:  # Disable steppers
 				self.pd.sendGCode("M84")
 			elif self.select_prepare.now == self.PREPARE_CASE_HOME:  # Homing
@@ -578,12 +643,9 @@ class DWIN_LCD:
 
 				self.pd.HMI_ValueStruct.show_mode = -4
 
-				self.lcd.Draw_Signed_Float(
-					self.lcd.font8x16, self.lcd.Select_Color, 2, 2, 202,
-					self.MBASE(self.PREPARE_CASE_ZOFF + self.MROWS - self.index_prepare),
-					self.pd.HMI_ValueStruct.offset_value
+				self.ZOffset_Field(self.PREPARE_CASE_ZOFF + self.MROWS - self.index_prepare).DrawScaled(
+					self.pd.HMI_ValueStruct.offset_value, bColor=self.lcd.Select_Color
 				)
-				self.EncoderRateLimit = False
 
 			elif self.select_prepare.now == self.PREPARE_CASE_PLA:  # PLA preheat
 				self.pd.preheat("PLA")
@@ -786,13 +848,10 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.TUNE_CASE_SPEED + self.MROWS - self.index_tune),
 					self.pd.feedrate_percentage
 				)
-				self.EncoderRateLimit = False
 			elif self.select_tune.now == self.TUNE_CASE_ZOFF:   #z offset
 				self.checkkey = self.Homeoffset
-				self.lcd.Draw_Signed_Float(
-					self.lcd.font8x16, self.lcd.Select_Color, 2, 2, 202,
-					self.MBASE(self.TUNE_CASE_ZOFF + self.MROWS - self.index_tune),
-					self.pd.HMI_ValueStruct.offset_value
+				self.ZOffset_Field(self.TUNE_CASE_ZOFF + self.MROWS - self.index_tune).DrawScaled(
+					self.pd.HMI_ValueStruct.offset_value, bColor=self.lcd.Select_Color
 				)
 
 		self.lcd.UpdateLCD()
@@ -803,10 +862,10 @@ class DWIN_LCD:
 			return
 
 		if (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.print_speed += 1
+			self.pd.HMI_ValueStruct.print_speed += self.EncoderStep
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.print_speed -= 1
+			self.pd.HMI_ValueStruct.print_speed -= self.EncoderStep
 
 		elif (encoder_diffState == self.ENCODER_DIFF_ENTER):
 			self.checkkey = self.Tune
@@ -831,24 +890,10 @@ class DWIN_LCD:
 					self.pd.HMI_flag.ETempTooLow_flag = False
 					self.pd.current_position.e = self.pd.HMI_ValueStruct.Move_E_scale = 0
 					self.Draw_Move_Menu()
-					self.lcd.Draw_FloatValue(
-						True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-						3, 1, 216, self.MBASE(1),
-						self.pd.HMI_ValueStruct.Move_X_scale
-					)
-					self.lcd.Draw_FloatValue(
-						True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-						3, 1, 216, self.MBASE(2),
-						self.pd.HMI_ValueStruct.Move_Y_scale
-					)
-					self.lcd.Draw_FloatValue(
-						True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-						3, 1, 216, self.MBASE(3),
-						self.pd.HMI_ValueStruct.Move_Z_scale
-					)
-					self.lcd.Draw_Signed_Float(
-						self.lcd.font8x16, self.lcd.Color_Bg_Black, 3, 1, 216, self.MBASE(4), 0
-					)
+					self.Axis_Field(1).DrawScaled(self.pd.HMI_ValueStruct.Move_X_scale)
+					self.Axis_Field(2).DrawScaled(self.pd.HMI_ValueStruct.Move_Y_scale)
+					self.Axis_Field(3).DrawScaled(self.pd.HMI_ValueStruct.Move_Z_scale)
+					self.Axis_Field(4).DrawScaled(0)
 					self.lcd.UpdateLCD()
 				return
 		# Avoid flicker by updating only the previous menu
@@ -868,30 +913,15 @@ class DWIN_LCD:
 			elif self.select_axis.now == 1:  # axis move
 				self.checkkey = self.Move_X
 				self.pd.HMI_ValueStruct.Move_X_scale = self.pd.current_position.x * self.MINUNITMULT
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-					3, 1, 216, self.MBASE(1),
-					self.pd.HMI_ValueStruct.Move_X_scale
-				)
-				self.EncoderRateLimit = False
+				self.Axis_Field(1).DrawScaled(self.pd.HMI_ValueStruct.Move_X_scale, bColor=self.lcd.Select_Color)
 			elif self.select_axis.now == 2:  # Y axis move
 				self.checkkey = self.Move_Y
 				self.pd.HMI_ValueStruct.Move_Y_scale = self.pd.current_position.y * self.MINUNITMULT
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-					3, 1, 216, self.MBASE(2),
-					self.pd.HMI_ValueStruct.Move_Y_scale
-				)
-				self.EncoderRateLimit = False
+				self.Axis_Field(2).DrawScaled(self.pd.HMI_ValueStruct.Move_Y_scale, bColor=self.lcd.Select_Color)
 			elif self.select_axis.now == 3:  # Z axis move
 				self.checkkey = self.Move_Z
 				self.pd.HMI_ValueStruct.Move_Z_scale = self.pd.current_position.z * self.MINUNITMULT
-				self.lcd.Draw_FloatValue(
-					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-					3, 1, 216, self.MBASE(3),
-					self.pd.HMI_ValueStruct.Move_Z_scale
-				)
-				self.EncoderRateLimit = False
+				self.Axis_Field(3).DrawScaled(self.pd.HMI_ValueStruct.Move_Z_scale, bColor=self.lcd.Select_Color)
 			elif self.select_axis.now == 4:  # Extruder
 				# window tips
 				if self.pd.PREVENT_COLD_EXTRUSION:
@@ -902,11 +932,7 @@ class DWIN_LCD:
 						return
 				self.checkkey = self.Extruder
 				self.pd.HMI_ValueStruct.Move_E_scale = self.pd.current_position.e * self.MINUNITMULT
-				self.lcd.Draw_Signed_Float(
-					self.lcd.font8x16, self.lcd.Select_Color, 3, 1, 216, self.MBASE(4),
-					self.pd.HMI_ValueStruct.Move_E_scale
-				)
-				self.EncoderRateLimit = False
+				self.Axis_Field(4).DrawScaled(self.pd.HMI_ValueStruct.Move_E_scale, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_Move_X(self):
@@ -915,19 +941,14 @@ class DWIN_LCD:
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_ENTER):
 			self.checkkey = self.AxisMove
-			self.EncoderRateLimit = True
-			self.lcd.Draw_FloatValue(
-				True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				3, 1, 216, self.MBASE(1),
-				self.pd.HMI_ValueStruct.Move_X_scale
-			)
+			self.Axis_Field(1).DrawScaled(self.pd.HMI_ValueStruct.Move_X_scale)
 			self.pd.moveAbsolute('X',self.pd.current_position.x, 5000)
 			self.lcd.UpdateLCD()
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.Move_X_scale += 1
+			self.pd.HMI_ValueStruct.Move_X_scale += self.EncoderStep
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.Move_X_scale -= 1
+			self.pd.HMI_ValueStruct.Move_X_scale -= self.EncoderStep
 
 		if self.pd.HMI_ValueStruct.Move_X_scale < (self.pd.X_MIN_POS) * self.MINUNITMULT:
 			self.pd.HMI_ValueStruct.Move_X_scale = (self.pd.X_MIN_POS) * self.MINUNITMULT
@@ -936,9 +957,7 @@ class DWIN_LCD:
 			self.pd.HMI_ValueStruct.Move_X_scale = (self.pd.X_MAX_POS) * self.MINUNITMULT
 
 		self.pd.current_position.x = self.pd.HMI_ValueStruct.Move_X_scale / 10
-		self.lcd.Draw_FloatValue(
-			True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-			3, 1, 216, self.MBASE(1), self.pd.HMI_ValueStruct.Move_X_scale)
+		self.Axis_Field(1).DrawScaled(self.pd.HMI_ValueStruct.Move_X_scale, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_Move_Y(self):
@@ -947,20 +966,15 @@ class DWIN_LCD:
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_ENTER):
 			self.checkkey = self.AxisMove
-			self.EncoderRateLimit = True
-			self.lcd.Draw_FloatValue(
-				True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				3, 1, 216, self.MBASE(2),
-				self.pd.HMI_ValueStruct.Move_Y_scale
-			)
+			self.Axis_Field(2).DrawScaled(self.pd.HMI_ValueStruct.Move_Y_scale)
 
 			self.pd.moveAbsolute('Y',self.pd.current_position.y, 5000)
 			self.lcd.UpdateLCD()
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.Move_Y_scale += 1
+			self.pd.HMI_ValueStruct.Move_Y_scale += self.EncoderStep
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.Move_Y_scale -= 1
+			self.pd.HMI_ValueStruct.Move_Y_scale -= self.EncoderStep
 
 		if self.pd.HMI_ValueStruct.Move_Y_scale < (self.pd.Y_MIN_POS) * self.MINUNITMULT:
 			self.pd.HMI_ValueStruct.Move_Y_scale = (self.pd.Y_MIN_POS) * self.MINUNITMULT
@@ -969,9 +983,7 @@ class DWIN_LCD:
 			self.pd.HMI_ValueStruct.Move_Y_scale = (self.pd.Y_MAX_POS) * self.MINUNITMULT
 
 		self.pd.current_position.y = self.pd.HMI_ValueStruct.Move_Y_scale / 10
-		self.lcd.Draw_FloatValue(
-			True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-			3, 1, 216, self.MBASE(2), self.pd.HMI_ValueStruct.Move_Y_scale)
+		self.Axis_Field(2).DrawScaled(self.pd.HMI_ValueStruct.Move_Y_scale, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_Move_Z(self):
@@ -980,19 +992,14 @@ class DWIN_LCD:
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_ENTER):
 			self.checkkey = self.AxisMove
-			self.EncoderRateLimit = True
-			self.lcd.Draw_FloatValue(
-				True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				3, 1, 216, self.MBASE(3),
-				self.pd.HMI_ValueStruct.Move_Z_scale
-			)
+			self.Axis_Field(3).DrawScaled(self.pd.HMI_ValueStruct.Move_Z_scale)
 			self.pd.moveAbsolute('Z',self.pd.current_position.z, 600)
 			self.lcd.UpdateLCD()
 			return
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.Move_Z_scale += 1
+			self.pd.HMI_ValueStruct.Move_Z_scale += self.EncoderStep
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.Move_Z_scale -= 1
+			self.pd.HMI_ValueStruct.Move_Z_scale -= self.EncoderStep
 
 		if self.pd.HMI_ValueStruct.Move_Z_scale < (self.pd.Z_MIN_POS) * self.MINUNITMULT:
 			self.pd.HMI_ValueStruct.Move_Z_scale = (self.pd.Z_MIN_POS) * self.MINUNITMULT
@@ -1001,9 +1008,7 @@ class DWIN_LCD:
 			self.pd.HMI_ValueStruct.Move_Z_scale = (self.pd.Z_MAX_POS) * self.MINUNITMULT
 
 		self.pd.current_position.z = self.pd.HMI_ValueStruct.Move_Z_scale / 10
-		self.lcd.Draw_FloatValue(
-			True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
-			3, 1, 216, self.MBASE(3), self.pd.HMI_ValueStruct.Move_Z_scale)
+		self.Axis_Field(3).DrawScaled(self.pd.HMI_ValueStruct.Move_Z_scale, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_Move_E(self):
@@ -1014,25 +1019,21 @@ class DWIN_LCD:
 
 		elif (encoder_diffState == self.ENCODER_DIFF_ENTER):
 			self.checkkey = self.AxisMove
-			self.EncoderRateLimit = True
 			self.pd.last_E_scale = self.pd.HMI_ValueStruct.Move_E_scale
-			self.lcd.Draw_Signed_Float(
-				self.lcd.font8x16, self.lcd.Color_Bg_Black, 3, 1, 216,
-				self.MBASE(4), self.pd.HMI_ValueStruct.Move_E_scale
-			)
+			self.Axis_Field(4).DrawScaled(self.pd.HMI_ValueStruct.Move_E_scale)
 			self.pd.moveAbsolute('E',self.pd.current_position.e, 300)
 			self.lcd.UpdateLCD()
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.Move_E_scale += 1
+			self.pd.HMI_ValueStruct.Move_E_scale += self.EncoderStep
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.Move_E_scale -= 1
+			self.pd.HMI_ValueStruct.Move_E_scale -= self.EncoderStep
 
 		if ((self.pd.HMI_ValueStruct.Move_E_scale - self.pd.last_E_scale) > (self.pd.EXTRUDE_MAXLENGTH) * self.MINUNITMULT):
 			self.pd.HMI_ValueStruct.Move_E_scale = self.pd.last_E_scale + (self.pd.EXTRUDE_MAXLENGTH) * self.MINUNITMULT
 		elif ((self.pd.last_E_scale - self.pd.HMI_ValueStruct.Move_E_scale) > (self.pd.EXTRUDE_MAXLENGTH) * self.MINUNITMULT):
 			self.pd.HMI_ValueStruct.Move_E_scale = self.pd.last_E_scale - (self.pd.EXTRUDE_MAXLENGTH) * self.MINUNITMULT
 		self.pd.current_position.e = self.pd.HMI_ValueStruct.Move_E_scale / 10
-		self.lcd.Draw_Signed_Float(self.lcd.font8x16, self.lcd.Select_Color, 3, 1, 216, self.MBASE(4), self.pd.HMI_ValueStruct.Move_E_scale)
+		self.Axis_Field(4).DrawScaled(self.pd.HMI_ValueStruct.Move_E_scale, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_Temperature(self):
@@ -1060,7 +1061,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(1),
 					self.pd.thermalManager['temp_hotend'][0]['target']
 				)
-				self.EncoderRateLimit = False
 			elif self.select_temp.now == self.TEMP_CASE_BED:  # Bed temperature
 				self.checkkey = self.BedTemp
 				self.pd.HMI_ValueStruct.Bed_Temp = self.pd.thermalManager['temp_bed']['target']
@@ -1069,7 +1069,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(2),
 					self.pd.thermalManager['temp_bed']['target']
 				)
-				self.EncoderRateLimit = False
 			elif self.select_temp.now == self.TEMP_CASE_FAN:  # Fan speed
 				self.checkkey = self.FanSpeed
 				self.pd.HMI_ValueStruct.Fan_speed = self.pd.thermalManager['fan_speed'][0]
@@ -1077,7 +1076,6 @@ class DWIN_LCD:
 					True, True, 0, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Select_Color,
 					3, 216, self.MBASE(3), self.pd.thermalManager['fan_speed'][0]
 				)
-				self.EncoderRateLimit = False
 
 			elif self.select_temp.now == self.TEMP_CASE_PLA:  # PLA preheat setting
 				self.checkkey = self.PLAPreheat
@@ -1200,7 +1198,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_TEMP),
 					self.pd.material_preset[0].hotend_temp
 				)
-				self.EncoderRateLimit = False
 			elif self.select_PLA.now == self.PREHEAT_CASE_BED:  # Bed temperature
 				self.checkkey = self.BedTemp
 				self.pd.HMI_ValueStruct.Bed_Temp = self.pd.material_preset[0].bed_temp
@@ -1209,7 +1206,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_BED),
 					self.pd.material_preset[0].bed_temp
 				)
-				self.EncoderRateLimit = False
 			elif self.select_PLA.now == self.PREHEAT_CASE_FAN:  # Fan speed
 				self.checkkey = self.FanSpeed
 				self.pd.HMI_ValueStruct.Fan_speed = self.pd.material_preset[0].fan_speed
@@ -1218,7 +1214,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_FAN),
 					self.pd.material_preset[0].fan_speed
 				)
-				self.EncoderRateLimit = False
 			elif self.select_PLA.now == self.PREHEAT_CASE_SAVE:  # Save PLA configuration
 				success = self.pd.save_settings()
 				self.HMI_AudioFeedback(success)
@@ -1252,7 +1247,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_TEMP),
 					self.pd.material_preset[1].hotend_temp
 				)
-				self.EncoderRateLimit = False
 			elif self.select_ABS.now == self.PREHEAT_CASE_BED:  # Bed temperature
 				self.checkkey = self.BedTemp
 				self.pd.HMI_ValueStruct.Bed_Temp = self.pd.material_preset[1].bed_temp
@@ -1261,7 +1255,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_BED),
 					self.pd.material_preset[1].bed_temp
 				)
-				self.EncoderRateLimit = False
 			elif self.select_ABS.now == self.PREHEAT_CASE_FAN:  # Fan speed
 				self.checkkey = self.FanSpeed
 				self.pd.HMI_ValueStruct.Fan_speed = self.pd.material_preset[1].fan_speed
@@ -1270,7 +1263,6 @@ class DWIN_LCD:
 					3, 216, self.MBASE(self.PREHEAT_CASE_FAN),
 					self.pd.material_preset[1].fan_speed
 				)
-				self.EncoderRateLimit = False
 			elif self.select_ABS.now == self.PREHEAT_CASE_SAVE:  # Save PLA configuration
 				success = self.pd.save_settings()
 				self.HMI_AudioFeedback(success)
@@ -1291,7 +1283,6 @@ class DWIN_LCD:
 			temp_line = self.TUNE_CASE_TEMP + self.MROWS - self.index_tune
 
 		if (encoder_diffState == self.ENCODER_DIFF_ENTER):
-			self.EncoderRateLimit = True
 			if (self.pd.HMI_ValueStruct.show_mode == -1):  # temperature
 				self.checkkey = self.TemperatureID
 				self.lcd.Draw_IntValue(
@@ -1328,10 +1319,10 @@ class DWIN_LCD:
 			return
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.E_Temp += 1
+			self.pd.HMI_ValueStruct.E_Temp += self.EncoderStep
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.E_Temp -= 1
+			self.pd.HMI_ValueStruct.E_Temp -= self.EncoderStep
 
 		# E_Temp limit
 		if self.pd.HMI_ValueStruct.E_Temp > self.pd.MAX_E_TEMP:
@@ -1360,7 +1351,6 @@ class DWIN_LCD:
 			bed_line = self.TUNE_CASE_TEMP + self.MROWS - self.index_tune
 
 		if (encoder_diffState == self.ENCODER_DIFF_ENTER):
-			self.EncoderRateLimit = True
 			if (self.pd.HMI_ValueStruct.show_mode == -1):  # temperature
 				self.checkkey = self.TemperatureID
 				self.lcd.Draw_IntValue(
@@ -1397,10 +1387,10 @@ class DWIN_LCD:
 			return
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.Bed_Temp += 1
+			self.pd.HMI_ValueStruct.Bed_Temp += self.EncoderStep
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.Bed_Temp -= 1
+			self.pd.HMI_ValueStruct.Bed_Temp -= self.EncoderStep
 
 		# Bed_Temp limit
 		if self.pd.HMI_ValueStruct.Bed_Temp > self.pd.BED_MAX_TARGET:
@@ -1445,25 +1435,21 @@ class DWIN_LCD:
 			zoff_line = self.TUNE_CASE_ZOFF + self.MROWS - self.index_tune
 
 		if (encoder_diffState == self.ENCODER_DIFF_ENTER): #if (applyencoder(encoder_diffstate, offset_value))
-			self.EncoderRateLimit = True
 			if self.pd.HAS_BED_PROBE:
 				self.pd.offset_z(self.dwin_zoffset)
 			else:
 				self.pd.setZOffset(self.dwin_zoffset) # manually set
 
 			self.checkkey = self.Prepare if self.pd.HMI_ValueStruct.show_mode == -4 else self.Tune
-			self.lcd.Draw_Signed_Float(
-				self.lcd.font8x16, self.lcd.Color_Bg_Black, 2, 2, 202, self.MBASE(zoff_line),
-				self.pd.HMI_ValueStruct.offset_value
-			)
+			self.ZOffset_Field(zoff_line).DrawScaled(self.pd.HMI_ValueStruct.offset_value)
 
 			self.lcd.UpdateLCD()
 			return
 
 		elif (encoder_diffState == self.ENCODER_DIFF_CW):
-			self.pd.HMI_ValueStruct.offset_value += 1
+			self.pd.HMI_ValueStruct.offset_value += self.EncoderStep
 		elif (encoder_diffState == self.ENCODER_DIFF_CCW):
-			self.pd.HMI_ValueStruct.offset_value -= 1
+			self.pd.HMI_ValueStruct.offset_value -= self.EncoderStep
 
 		if (self.pd.HMI_ValueStruct.offset_value < (self.pd.Z_PROBE_OFFSET_RANGE_MIN) * 100):
 			self.pd.HMI_ValueStruct.offset_value = self.pd.Z_PROBE_OFFSET_RANGE_MIN * 100
@@ -1475,11 +1461,7 @@ class DWIN_LCD:
 		if self.pd.HAS_BED_PROBE:
 			self.pd.add_mm('Z', self.dwin_zoffset - self.last_zoffset)
 
-		self.lcd.Draw_Signed_Float(
-			self.lcd.font8x16, self.lcd.Select_Color, 2, 2, 202,
-			self.MBASE(zoff_line),
-			self.pd.HMI_ValueStruct.offset_value
-		)
+		self.ZOffset_Field(zoff_line).DrawScaled(self.pd.HMI_ValueStruct.offset_value, bColor=self.lcd.Select_Color)
 		self.lcd.UpdateLCD()
 
 	def HMI_MaxSpeed(self):
@@ -1525,75 +1507,80 @@ class DWIN_LCD:
 	# --------------------------------------------------------------#
 	# --------------------------------------------------------------#
 
+	# The background, icons and labels of the status area and each value are retained regions,
+	# so a refresh only sends the values that changed.
 	def Draw_Status_Area(self, with_update):
-		#  Clear the bottom area of the screen
-		self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Black, 0, self.STATUS_Y, self.lcd.DWIN_WIDTH, self.lcd.DWIN_HEIGHT - 1)
-		#
-		#  Status Area
-		#
-		if self.pd.HAS_HOTEND:
-			self.lcd.ICON_Show(self.ICON, self.ICON_HotendTemp, 13, 381)
-			self.lcd.Draw_IntValue(
-				True, True, 0, self.lcd.DWIN_FONT_STAT,
-				self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				3, 33, 382,
-				self.pd.thermalManager['temp_hotend'][0]['celsius']
-			)
+		with self.lcd.Region('status', (0, self.STATUS_Y, self.lcd.DWIN_WIDTH - 1, self.lcd.DWIN_HEIGHT - 1)):
+			#  Clear the bottom area of the screen
+			self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Black, 0, self.STATUS_Y, self.lcd.DWIN_WIDTH, self.lcd.DWIN_HEIGHT - 1)
+			#
+			#  Status Area
+			#
+			if self.pd.HAS_HOTEND:
+				self.lcd.ICON_Show(self.ICON, self.ICON_HotendTemp, 13, 381)
+				self.lcd.Draw_String(
+					False, False, self.lcd.DWIN_FONT_STAT,
+					self.lcd.Color_White, self.lcd.Color_Bg_Black,
+					33 + 3 * self.STAT_CHR_W + 5, 383,
+					"/"
+				)
+
+			if self.pd.HOTENDS > 1:
+				self.lcd.ICON_Show(self.ICON, self.ICON_HotendTemp, 13, 381)
+
+			if self.pd.HAS_HEATED_BED:
+				self.lcd.ICON_Show(self.ICON, self.ICON_BedTemp, 158, 381)
+				self.lcd.Draw_String(
+					False, False, self.lcd.DWIN_FONT_STAT, self.lcd.Color_White,
+					self.lcd.Color_Bg_Black, 178 + 3 * self.STAT_CHR_W + 5, 383,
+					"/"
+				)
+
+			self.lcd.ICON_Show(self.ICON, self.ICON_Speed, 13, 429)
 			self.lcd.Draw_String(
 				False, False, self.lcd.DWIN_FONT_STAT,
-				self.lcd.Color_White, self.lcd.Color_Bg_Black,
-				33 + 3 * self.STAT_CHR_W + 5, 383,
-				"/"
-			)
-			self.lcd.Draw_IntValue(
-				True, True, 0, self.lcd.DWIN_FONT_STAT,
-				self.lcd.Color_White, self.lcd.Color_Bg_Black, 3, 33 + 4 * self.STAT_CHR_W + 6, 382,
-				self.pd.thermalManager['temp_hotend'][0]['target']
+				self.lcd.Color_White, self.lcd.Color_Bg_Black, 33 + 5 * self.STAT_CHR_W + 2, 429,
+				"%"
 			)
 
-		if self.pd.HOTENDS > 1:
-			self.lcd.ICON_Show(self.ICON, self.ICON_HotendTemp, 13, 381)
+			if self.pd.HAS_ZOFFSET_ITEM:
+				self.lcd.ICON_Show(self.ICON, self.ICON_Zoffset, 158, 428)
+
+		# Values are fields of their own, sent only when they change
+		stat = self.lcd.DWIN_FONT_STAT
+		if self.pd.HAS_HOTEND:
+			hotend = self.pd.thermalManager['temp_hotend'][0]
+			self.lcd.NumericField(stat, 3, 0, 33, 382, key='status.hotend').Draw(hotend['celsius'])
+			self.lcd.NumericField(stat, 3, 0, 33 + 4 * self.STAT_CHR_W + 6, 382, key='status.hotend.target').Draw(hotend['target'])
 
 		if self.pd.HAS_HEATED_BED:
-			self.lcd.ICON_Show(self.ICON, self.ICON_BedTemp, 158, 381)
-			self.lcd.Draw_IntValue(
-				True, True, 0, self.lcd.DWIN_FONT_STAT, self.lcd.Color_White,
-				self.lcd.Color_Bg_Black, 3, 178, 382,
-				self.pd.thermalManager['temp_bed']['celsius']
-			)
-			self.lcd.Draw_String(
-				False, False, self.lcd.DWIN_FONT_STAT, self.lcd.Color_White,
-				self.lcd.Color_Bg_Black, 178 + 3 * self.STAT_CHR_W + 5, 383,
-				"/"
-			)
-			self.lcd.Draw_IntValue(
-				True, True, 0, self.lcd.DWIN_FONT_STAT,
-				self.lcd.Color_White, self.lcd.Color_Bg_Black, 3, 178 + 4 * self.STAT_CHR_W + 6, 382,
-				self.pd.thermalManager['temp_bed']['target']
-			)
+			bed = self.pd.thermalManager['temp_bed']
+			self.lcd.NumericField(stat, 3, 0, 178, 382, key='status.bed').Draw(bed['celsius'])
+			self.lcd.NumericField(stat, 3, 0, 178 + 4 * self.STAT_CHR_W + 6, 382, key='status.bed.target').Draw(bed['target'])
 
-		self.lcd.ICON_Show(self.ICON, self.ICON_Speed, 13, 429)
-		self.lcd.Draw_IntValue(
-			True, True, 0, self.lcd.DWIN_FONT_STAT,
-			self.lcd.Color_White, self.lcd.Color_Bg_Black, 3, 33 + 2 * self.STAT_CHR_W, 429,
-			self.pd.feedrate_percentage
-		)
-		self.lcd.Draw_String(
-			False, False, self.lcd.DWIN_FONT_STAT,
-			self.lcd.Color_White, self.lcd.Color_Bg_Black, 33 + 5 * self.STAT_CHR_W + 2, 429,
-			"%"
-		)
+		self.lcd.NumericField(stat, 3, 0, 33 + 2 * self.STAT_CHR_W, 429, key='status.speed').Draw(self.pd.feedrate_percentage)
 
 		if self.pd.HAS_ZOFFSET_ITEM:
-			self.lcd.ICON_Show(self.ICON, self.ICON_Zoffset, 158, 428)
-			self.lcd.Draw_Signed_Float(self.lcd.DWIN_FONT_STAT, self.lcd.Color_Bg_Black, 2, 2, 178, 429, self.pd.BABY_Z_VAR * 100)
+			self.lcd.NumericField(stat, 2, 2, 178, 429, signed=True, key='status.zoffset').Draw(self.pd.BABY_Z_VAR)
 
 		# if with_update:
 		# 	self.lcd.UpdateLCD()
 		# 	time.sleep(.005)
 
+	# Value fields of the move screen: X, Y, Z and the signed E on lines 1 to 4, one decimal
+	def Axis_Field(self, line):
+		return self.lcd.NumericField(self.lcd.font8x16, 3, 1, 216, self.MBASE(line), signed=line == 4)
+
+	# Z offset field of a menu line, two decimals
+	def ZOffset_Field(self, line):
+		return self.lcd.NumericField(self.lcd.font8x16, 2, 2, 202, self.MBASE(line), signed=True)
+
+	# Full screen width box for one line of text at y
+	def Text_Row(self, y, height=16):
+		return (0, y, self.lcd.DWIN_WIDTH - 1, y + height - 1)
+
 	def Draw_Title(self, title):
-		self.lcd.Draw_String(False, False, self.lcd.DWIN_FONT_HEAD, self.lcd.Color_White, self.lcd.Color_Bg_Blue, 14, 4, title)
+		dwinText.draw(self.lcd, False, self.lcd.DWIN_FONT_HEAD, self.lcd.Color_White, self.lcd.Color_Bg_Blue, (14, 4, self.lcd.DWIN_WIDTH - 1, 29), title)
 
 	def Draw_Popup_Bkgd_105(self):
 		self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Window, 14, 105, 258, 374)
@@ -1609,7 +1596,10 @@ class DWIN_LCD:
 
 	def Draw_Menu_Line(self, line, icon=False, label=False):
 		if (label):
-			self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, self.LBLX, self.MBASE(line) - 1, label)
+			dwinText.draw(
+				self.lcd, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
+				(self.LBLX, self.MBASE(line) - 1, self.LBLX + self.MENU_CHAR_LIMIT * self.MENU_CHR_W - 1, self.MBASE(line) + 14), label
+			)
 		if (icon):
 			self.Draw_Menu_Icon(line, icon)
 		self.lcd.Draw_Line(self.lcd.Line_Color, 16, self.MBASE(line) + 33, 256, self.MBASE(line) + 34)
@@ -1673,23 +1663,40 @@ class DWIN_LCD:
 	def Draw_Print_ProgressBar(self, Percentrecord=None):
 		if not Percentrecord:
 			Percentrecord = self.pd.getPercent()
-		self.lcd.ICON_Show(self.ICON, self.ICON_Bar, 15, 93)
-		self.lcd.Draw_Rectangle(1, self.lcd.BarFill_Color, 16 + Percentrecord * 240 / 100, 93, 256, 113)
-		self.lcd.Draw_IntValue(True, True, 0, self.lcd.font8x16, self.lcd.Percent_Color, self.lcd.Color_Bg_Black, 2, 117, 133, Percentrecord)
-		self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Percent_Color, self.lcd.Color_Bg_Black, 133, 133, "%")
+		with self.lcd.Region('progress.bar', (15, 93, 256, 113)):
+			self.lcd.ICON_Show(self.ICON, self.ICON_Bar, 15, 93)
+			self.lcd.Draw_Rectangle(1, self.lcd.BarFill_Color, 16 + Percentrecord * 240 / 100, 93, 256, 113)
+		with self.lcd.Region('progress.percent'):
+			self.lcd.Draw_IntValue(True, True, 0, self.lcd.font8x16, self.lcd.Percent_Color, self.lcd.Color_Bg_Black, 2, 117, 133, Percentrecord)
+			self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Percent_Color, self.lcd.Color_Bg_Black, 133, 133, "%")
 
 	def Draw_Print_ProgressElapsed(self):
 		elapsed = self.pd.duration()  # print timer
-		self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 42, 212, elapsed / 3600)
-		self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 58, 212, ":")
-		self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 66, 212, (elapsed % 3600) / 60)
+		with self.lcd.Region('progress.elapsed'):
+			self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 42, 212, elapsed / 3600)
+			self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 58, 212, ":")
+			self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 66, 212, (elapsed % 3600) / 60)
 
 	def Draw_Print_ProgressRemain(self):
 		remain_time = self.pd.remain()
 		if not remain_time: return #time remaining is None during warmup.
-		self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 176, 212, remain_time / 3600)
-		self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 192, 212, ":")
-		self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 200, 212, (remain_time % 3600) / 60)
+		with self.lcd.Region('progress.remain'):
+			self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 176, 212, remain_time / 3600)
+			self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 192, 212, ":")
+			self.lcd.Draw_IntValue(True, True, 1, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, 2, 200, 212, (remain_time % 3600) / 60)
+
+	# Thumbnail worker thread: the thumbnail is in its picture slot, draw it from the UI thread
+	def HMI_ThumbnailReady(self, name, slot, size):
+		self.input.post(THUMBNAIL, (name, slot, size))
+
+	# UI thread: show the thumbnail if its file is still the one on the print screen
+	def Draw_Print_Thumbnail(self, name, slot, size):
+		if self.checkkey != self.PrintProcess or self.pd.file_name != name:
+			return
+		with self.lcd.Batch():
+			self.lcd.JPG_CacheToN(self.THUMB_AREA, slot)
+			self.lcd.Frame_AreaCopy(self.THUMB_AREA, 0, 0, size[0] - 1, size[1] - 1, self.THUMB_X, self.THUMB_Y)
+			self.lcd.UpdateLCD()
 
 	def Draw_Print_File_Menu(self):
 		self.Clear_Title_Bar()
@@ -1743,24 +1750,21 @@ class DWIN_LCD:
 	def Draw_Info_Menu(self):
 		self.Clear_Main_Window()
 
-		self.lcd.Draw_String(
-			False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-			(self.lcd.DWIN_WIDTH - len(self.pd.MACHINE_SIZE) * self.MENU_CHR_W) / 2, 122,
-			self.pd.MACHINE_SIZE
+		dwinText.draw(
+			self.lcd, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
+			self.Text_Row(122), self.pd.MACHINE_SIZE, dwinText.CENTER
 		)
-		self.lcd.Draw_String(
-			False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-			(self.lcd.DWIN_WIDTH - len(self.pd.SHORT_BUILD_VERSION) * self.MENU_CHR_W) / 2, 195,
-			self.pd.SHORT_BUILD_VERSION
+		dwinText.draw(
+			self.lcd, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
+			self.Text_Row(195), self.pd.SHORT_BUILD_VERSION, dwinText.CENTER
 		)
 		self.lcd.Frame_TitleCopy(1, 190, 16, 215, 26)  # "Info"
 		self.lcd.Frame_AreaCopy(1, 120, 150, 146, 161, 124, 102)
 		self.lcd.Frame_AreaCopy(1, 146, 151, 254, 161, 82, 175)
 		self.lcd.Frame_AreaCopy(1, 0, 165, 94, 175, 89, 248)
-		self.lcd.Draw_String(
-			False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
-			(self.lcd.DWIN_WIDTH - len(self.pd.CORP_WEBSITE_E) * self.MENU_CHR_W) / 2, 268,
-			self.pd.CORP_WEBSITE_E
+		dwinText.draw(
+			self.lcd, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black,
+			self.Text_Row(268), self.pd.CORP_WEBSITE_E, dwinText.CENTER
 		)
 		self.Draw_Back_First()
 		for i in range(3):
@@ -1813,9 +1817,7 @@ class DWIN_LCD:
 		 	)
 		if self.pd.HAS_ZOFFSET_ITEM:
 		 	self.Draw_Menu_Line(self.TUNE_CASE_ZOFF, self.ICON_Zoffset)
-		 	self.lcd.Draw_Signed_Float(
-		 		self.lcd.font8x16, self.lcd.Color_Bg_Black, 2, 2, 202, self.MBASE(self.TUNE_CASE_ZOFF), self.pd.BABY_Z_VAR * 100
-		 	)
+		 	self.ZOffset_Field(self.TUNE_CASE_ZOFF).Draw(self.pd.BABY_Z_VAR)
 
 	def Draw_Temperature_Menu(self):
 		self.Clear_Main_Window()
@@ -1950,8 +1952,8 @@ class DWIN_LCD:
 		# Copy into filebuf string before entry
 		name = self.pd.file_name
 		if name:
-			npos = _MAX(0, self.lcd.DWIN_WIDTH - len(name) * self.MENU_CHR_W) / 2
-			self.lcd.Draw_String(False, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, npos, 60, name)
+			dwinText.draw(self.lcd, False, self.lcd.font8x16, self.lcd.Color_White, self.lcd.Color_Bg_Black, self.Text_Row(60), name, dwinText.CENTER)
+			self.thumbnails.request(name, self.HMI_ThumbnailReady)
 
 		self.lcd.ICON_Show(self.ICON, self.ICON_PrintTime, 17, 193)
 		self.lcd.ICON_Show(self.ICON, self.ICON_RemainTime, 150, 191)
@@ -1981,16 +1983,14 @@ class DWIN_LCD:
 		self.Clear_Main_Window()
 		self.Draw_Popup_Bkgd_60()
 		if(self.select_print.now == 1):
-			self.lcd.Draw_String(
-				False, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
-				(272 - 8 * 11) / 2, 150,
-				self.MSG_PAUSE_PRINT
+			dwinText.draw(
+				self.lcd, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
+				self.Text_Row(150), self.MSG_PAUSE_PRINT, dwinText.CENTER
 			)
 		elif (self.select_print.now == 2):
-			self.lcd.Draw_String(
-				False, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
-				(272 - 8 * 10) / 2, 150,
-				self.MSG_STOP_PRINT
+			dwinText.draw(
+				self.lcd, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
+				self.Text_Row(150), self.MSG_STOP_PRINT, dwinText.CENTER
 			)
 		self.lcd.ICON_Show(self.ICON, self.ICON_Confirm_E, 26, 280)
 		self.lcd.ICON_Show(self.ICON, self.ICON_Cancel_E, 146, 280)
@@ -2000,18 +2000,13 @@ class DWIN_LCD:
 		self.Clear_Main_Window()
 		self.Draw_Popup_Bkgd_60()
 		self.lcd.ICON_Show(self.ICON, self.ICON_BLTouch, 101, 105)
-		if parking:
-			self.lcd.Draw_String(
-				False, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
-				(272 - 8 * (7)) / 2, 230, "Parking")
-		else:
-			self.lcd.Draw_String(
-				False, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
-				(272 - 8 * (10)) / 2, 230, "Homing XYZ")
+		dwinText.draw(
+			self.lcd, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
+			self.Text_Row(230), "Parking" if parking else "Homing XYZ", dwinText.CENTER)
 
-		self.lcd.Draw_String(
-			False, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
-			(272 - 8 * 23) / 2, 260, "Please wait until done.")
+		dwinText.draw(
+			self.lcd, True, self.lcd.font8x16, self.lcd.Popup_Text_Color, self.lcd.Color_Bg_Window,
+			self.Text_Row(260), "Please wait until done.", dwinText.CENTER)
 
 	def Popup_Window_ETempTooLow(self):
 		self.Clear_Main_Window()
@@ -2060,7 +2055,7 @@ class DWIN_LCD:
 				self.Draw_SDItem(i, i + 1)
 		else:
 			self.lcd.Draw_Rectangle(1, self.lcd.Color_Bg_Red, 10, self.MBASE(3) - 10, self.lcd.DWIN_WIDTH - 10, self.MBASE(4))
-			self.lcd.Draw_String(False, False, self.lcd.font16x32, self.lcd.Color_Yellow, self.lcd.Color_Bg_Red, ((self.lcd.DWIN_WIDTH) - 8 * 16) / 2, self.MBASE(3), "No Media")
+			dwinText.draw(self.lcd, False, self.lcd.font16x32, self.lcd.Color_Yellow, self.lcd.Color_Bg_Red, self.Text_Row(self.MBASE(3), 32), "No Media", dwinText.CENTER)
 
 	def CompletedHoming(self):
 		self.pd.HMI_flag.home_flag = False
@@ -2187,7 +2182,7 @@ class DWIN_LCD:
 	def Item_Prepare_Offset(self, row):
 		if self.pd.HAS_BED_PROBE:
 			self.lcd.Frame_AreaCopy(1, 93, 179, 141, 189, self.LBLX, self.MBASE(row))  # "Z-Offset"
-			self.lcd.Draw_Signed_Float(self.lcd.font8x16, self.lcd.Color_Bg_Black, 2, 2, 202, self.MBASE(row), self.pd.BABY_Z_VAR * 100)
+			self.ZOffset_Field(row).Draw(self.pd.BABY_Z_VAR)
 		else:
 			self.lcd.Frame_AreaCopy(1, 1, 76, 106, 86, self.LBLX, self.MBASE(row))  # "..."
 		self.Draw_Menu_Line(row, self.ICON_SetHome)
@@ -2212,6 +2207,10 @@ class DWIN_LCD:
 	def EachMomentUpdate(self):
 		# variable update
 		update = self.pd.update_variable()
+		with self.lcd.Batch():
+			self.Draw_MomentUpdate(update)
+
+	def Draw_MomentUpdate(self, update):
 		if self.last_status != self.pd.status:
 			self.last_status = self.pd.status
 			print(self.pd.status)
@@ -2248,7 +2247,52 @@ class DWIN_LCD:
 			self.Draw_Status_Area(update)
 		self.lcd.UpdateLCD()
 
-	def encoder_has_data(self, val):
+	# GPIO callback thread: queue the detents turned since the last call
+	def HMI_EncoderMoved(self, value):
+		self.input.post(TURN, value - self.EncodePosted, self.encoder.last_detent)
+		self.EncodePosted = value
+
+	# GPIO callback thread: queue a press
+	def HMI_ButtonPressed(self, kind, when):
+		self.input.post(ENTER, 0, when)
+
+	# UI thread: one coalesced input event or timer tick
+	def HMI_Event(self, event):
+		if event.kind == TICK:
+			self.EachMomentUpdate()
+			return
+		if event.kind == ATTACHED:
+			self.HMI_PanelRedraw()
+			return
+		if event.kind == THUMBNAIL:
+			self.Draw_Print_Thumbnail(*event.value)
+			return
+		if event.kind == TURN:
+			accel = self.ENCODER_ACCELERATION.get(self.checkkey)
+			if accel is not None:
+				# One call of the editor for all the detents: one redraw and one G-code
+				self.EncoderPending += 1 if event.value > 0 else -1
+				self.EncoderStep = abs(accel.apply(event.value, self.encoder.velocity()))
+			else:
+				self.EncoderPending += event.value
+		else:
+			self.EncoderEnter = True
+		span = self.trace.begin(self.checkkey, event.kind, event.time) if self.trace is not None else None
+		# Each call of a handler takes one detent, and every packet drawn for all of them goes out in one write
+		try:
+			with self.lcd.Batch():
+				for i in range(abs(event.value) + 1):
+					if not self.EncoderPending and not self.EncoderEnter:
+						break
+					self.HMI_Dispatch()
+		finally:
+			if span is not None:
+				self.trace.end(span)
+		self.EncoderPending = 0
+		self.EncoderEnter = False
+		self.EncoderStep = 1
+
+	def HMI_Dispatch(self):
 		if self.checkkey == self.MainMenu:
 			self.HMI_MainMenu()
 		elif self.checkkey == self.SelectFile:
@@ -2310,22 +2354,16 @@ class DWIN_LCD:
 		elif self.checkkey == self.Step_value:
 			self.HMI_StepXYZE()
 
+	# Take one queued detent or press, see HMI_Event()
 	def get_encoder_state(self):
-		if self.EncoderRateLimit:
-			if self.EncodeMS > current_milli_time():
-				return self.ENCODER_DIFF_NO
-			self.EncodeMS = current_milli_time() + self.ENCODER_WAIT
-
-		if self.encoder.value < self.EncodeLast:
-			self.EncodeLast = self.encoder.value
+		if self.EncoderPending < 0:
+			self.EncoderPending += 1
 			return self.ENCODER_DIFF_CW
-		elif self.encoder.value > self.EncodeLast:
-			self.EncodeLast = self.encoder.value
+		elif self.EncoderPending > 0:
+			self.EncoderPending -= 1
 			return self.ENCODER_DIFF_CCW
-		elif not GPIO.input(self.button_pin):
-			if self.EncodeEnter > current_milli_time(): # prevent double clicks
-				return self.ENCODER_DIFF_NO
-			self.EncodeEnter = current_milli_time() + self.ENCODER_WAIT_ENTER
+		elif self.EncoderEnter:
+			self.EncoderEnter = False
 			return self.ENCODER_DIFF_ENTER
 		else:
 			return self.ENCODER_DIFF_NO
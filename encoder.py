@@ -1,67 +1,289 @@
 # Class to monitor a rotary encoder and update a value.  You can either read the value when you need it, by calling getValue(), or
 # you can configure a callback which will be called whenever the value changes.
+# Button turns the edges of the encoder push button into press, release, long press and double click events.
+#
+#   python3 encoder.py    benchmarks the decoder, tests/test_encoder.py checks it against synthetic waveforms
+
+import sys
+import time
+import threading
+
+import dwinGPIO
+
+
+# Quadrature steps by (old state << 2) | new state, a state being (left pin << 1) | right pin.
+# Turning right goes 00 -> 01 -> 11 -> 10 -> 00, every transition of that cycle is +1 and the
+# reverse ones are -1. Staying put is 0, and so are the transitions where both pins changed:
+# they skipped a state and their direction is unknown.
+TRANSITIONS = (
+    0, +1, -1, 0,
+    -1, 0, 0, +1,
+    +1, 0, 0, -1,
+    0, -1, +1, 0,
+)
+REST = 0  # 00, the resting position of a detent
+
+
+class QuadratureDecoder:
+
+    #  steps_per_detent: transitions between two detents, 4 for the usual encoders
+    def __init__(self, steps_per_detent=4):
+        self.steps_per_detent = steps_per_detent
+        self.state = REST
+        self.steps = 0  # Signed transitions since the last detent
+        self.invalid = 0  # Transitions that skipped a state
+        self.edges = 0
+
+    # Feed the new pin levels, returns the detents completed: -1, 0 or +1 (more after skipped states)
+    def update(self, p1, p2):
+        new = (p1 << 1) | p2
+        index = (self.state << 2) | new
+        self.state = new
+        self.edges += 1
+        if index & 3 == index >> 2:
+            return 0
+        if (index ^ (index >> 2)) & 3 == 3:
+            self.invalid += 1
+        steps = self.steps + TRANSITIONS[index]
+        spd = self.steps_per_detent
+        if new == REST:
+            # Back at a detent: round to whole detents, exactly half a detent rounds away from zero.
+            # Half of the way can only end here through a skipped state, which hides the other half,
+            # so a missed state in between still counts, and bounces cancel out
+            self.steps = 0
+            if steps >= 0:
+                return (steps + spd // 2) // spd
+            return -((spd // 2 - steps) // spd)
+        if steps >= spd:
+            self.steps = steps - spd
+            return 1
+        if steps <= -spd:
+            self.steps = steps + spd
+            return -1
+        self.steps = steps
+        return 0
+
+
+# Value change per detent from the turning speed, for the value editors
+# Turning slower than slow detents/s changes the value by min_step per detent, at fast detents/s
+# and above by max_step, and in between along (speed fraction) ** shape: 1 is linear, larger
+# shapes keep fine control longer.
+class Acceleration:
+
+    def __init__(self, min_step=1, max_step=10, slow=4.0, fast=30.0, shape=2.0):
+        self.min_step = min_step
+        self.max_step = max_step
+        self.slow = slow
+        self.fast = fast
+        self.shape = shape
+
+    # Value change of one detent at velocity detents/s
+    def step(self, velocity):
+        if velocity <= self.slow:
+            return self.min_step
+        if velocity >= self.fast:
+            return self.max_step
+        f = ((velocity - self.slow) / (self.fast - self.slow)) ** self.shape
+        return int(round(self.min_step + (self.max_step - self.min_step) * f))
+
+    # Value change of detents turned at velocity
+    def apply(self, detents, velocity):
+        return detents * self.step(velocity)
 
-import RPi.GPIO as GPIO
 
 class Encoder:
 
-    def __init__(self, leftPin, rightPin, callback=None):
+    # Detents further apart than IDLE seconds start again from zero speed
+    IDLE = 0.3
+
+    #  gpio: dwinGPIO backend, or its name; the first one available by default
+    def __init__(self, leftPin, rightPin, callback=None, steps_per_detent=4, gpio=None):
         self.leftPin = leftPin
         self.rightPin = rightPin
         self.value = 0
-        self.state = '00'
-        self.direction = None
+        self.decoder = QuadratureDecoder(steps_per_detent)
+        self.last_detent = 0.0
+        self.interval = self.IDLE  # Smoothed time between detents
+        self.direction = 0
         self.callback = callback
-        GPIO.setup(self.leftPin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.setup(self.rightPin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-        GPIO.add_event_detect(self.leftPin, GPIO.BOTH, callback=self.transitionOccurred)  
-        GPIO.add_event_detect(self.rightPin, GPIO.BOTH, callback=self.transitionOccurred)  
-
-    def transitionOccurred(self, channel):
-        p1 = GPIO.input(self.leftPin)
-        p2 = GPIO.input(self.rightPin)
-        newState = "{}{}".format(p1, p2)
-
-        if self.state == "00": # Resting position
-            if newState == "01": # Turned right 1
-                self.direction = "R"
-            elif newState == "10": # Turned left 1
-                self.direction = "L"
-
-        elif self.state == "01": # R1 or L3 position
-            if newState == "11": # Turned right 1
-                self.direction = "R"
-            elif newState == "00": # Turned left 1
-                if self.direction == "L":
-                    self.value = self.value - 1
-                    if self.callback is not None:
-                        self.callback(self.value)
-
-        elif self.state == "10": # R3 or L1
-            if newState == "11": # Turned left 1
-                self.direction = "L"
-            elif newState == "00": # Turned right 1
-                if self.direction == "R":
-                    self.value = self.value + 1
-                    if self.callback is not None:
-                        self.callback(self.value)
-
-        else: # self.state == "11"
-            if newState == "01": # Turned left 1
-                self.direction = "L"
-            elif newState == "10": # Turned right 1
-                self.direction = "R"
-            elif newState == "00": # Skipped an intermediate 01 or 10 state, but if we know direction then a turn is complete
-                if self.direction == "L":
-                    self.value = self.value - 1
-                    if self.callback is not None:
-                        self.callback(self.value)
-                elif self.direction == "R":
-                    self.value = self.value + 1
-                    if self.callback is not None:
-                        self.callback(self.value)
-                
-        self.state = newState
+        self.gpio = dwinGPIO.open_backend(gpio, pins=(leftPin, rightPin))
+        self.gpio.watch(self.leftPin, self.transitionOccurred)
+        self.gpio.watch(self.rightPin, self.transitionOccurred)
+        # Each edge carries the level of one pin, the other one is known from its last edge
+        self.levels = {self.leftPin: self.gpio.input(self.leftPin), self.rightPin: self.gpio.input(self.rightPin)}
+        self.decoder.state = (self.levels[self.leftPin] << 1) | self.levels[self.rightPin]
+
+    def transitionOccurred(self, pin, level, timestamp):
+        levels = self.levels
+        levels[pin] = level
+        detents = self.decoder.update(levels[self.leftPin], levels[self.rightPin])
+        if detents:
+            self.detent(detents, timestamp)
+            self.value += detents
+            if self.callback is not None:
+                self.callback(self.value)
+
+    # Track the turning speed, a change of direction starts from zero speed
+    def detent(self, detents, now):
+        dt = now - self.last_detent
+        if dt >= self.IDLE or (detents > 0) != (self.direction > 0):
+            self.interval = self.IDLE
+        else:
+            self.interval += (dt / abs(detents) - self.interval) * 0.5
+        self.last_detent = now
+        self.direction = detents
+
+    # Turning speed in detents per second, 0 once the knob stopped
+    def velocity(self):
+        if time.monotonic() - self.last_detent >= self.IDLE:
+            return 0.0
+        return 1.0 / self.interval
 
     def getValue(self):
         return self.value
+
+    # Transitions that skipped a state, a growing count means edges are lost
+    def getInvalid(self):
+        return self.decoder.invalid
+
+    def close(self):
+        self.gpio.unwatch(self.leftPin)
+        self.gpio.unwatch(self.rightPin)
+
+
+# Button events from edge timestamps
+# Edges closer than debounce to the last accepted one are contact bounce. A press that comes
+# less than double_click after the release of a plain press is a double click instead of a
+# press, and a button held for long_press is a long press. The long press is reported by a timer
+# while the button is still held, or by poll(), and at the latest by the release edge.
+# Only the events in events are passed to the callback, the others never wake anyone.
+class ButtonDecoder:
+
+    PRESS = 'press'
+    RELEASE = 'release'
+    LONG = 'long'
+    DOUBLE = 'double'
+
+    #  callback(kind, time): called with the event kind and the time of its edge
+    #  timer: start a timer thread for long presses, without it call poll() to see them before the release
+    def __init__(self, callback=None, events=(PRESS,), debounce=0.02, long_press=0.8, double_click=0.3, timer=True):
+        self.callback = callback
+        self.events = frozenset(events)
+        self.debounce = debounce
+        self.long_press = long_press
+        self.double_click = double_click
+        self.use_timer = timer
+        self.pressed = False
+        self.last_edge = -debounce
+        self.press_time = 0.0
+        self.clickable = False  # The current press is a plain click so far
+        self.long_sent = False  # The current press was reported as a long press
+        self.last_click = None  # Release time of the last press that can start a double click
+        self.presses = 0
+        self.bounces = 0
+        self.timer = None
+
+    # Feed the button state after an edge and the time of the edge
+    def edge(self, pressed, now):
+        if pressed == self.pressed:
+            return
+        if now - self.last_edge < self.debounce:
+            self.bounces += 1
+            return
+        self.last_edge = now
+        if not pressed and self.LONG in self.events:
+            self.poll(now)
+        self.pressed = pressed
+        if pressed:
+            self.presses += 1
+            self.press_time = now
+            self.long_sent = False
+            double = self.last_click is not None and now - self.last_click < self.double_click
+            # A double click does not start another one, and neither does a long press
+            self.last_click = None
+            self.clickable = not double
+            if self.LONG in self.events and self.use_timer:
+                self.timer = threading.Timer(self.long_press, self.held, (self.presses,))
+                self.timer.daemon = True
+                self.timer.start()
+            self.emit(self.DOUBLE if double else self.PRESS, now)
+        else:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if self.clickable and now - self.press_time < self.long_press:
+                self.last_click = now
+            self.emit(self.RELEASE, now)
+
+    # Timer thread: the press it was started for may be over
+    def held(self, press):
+        if self.presses == press:
+            self.poll(self.press_time + self.long_press)
+
+    # Report a long press once the button has been held for long_press at time now
+    def poll(self, now):
+        if self.pressed and not self.long_sent and now - self.press_time >= self.long_press:
+            self.long_sent = True
+            self.emit(self.LONG, self.press_time + self.long_press)
+
+    def emit(self, kind, now):
+        if kind in self.events and self.callback is not None:
+            self.callback(kind, now)
+
+
+class Button:
+
+    #  pin: GPIO pin, pressed pulls it low
+    #  gpio: dwinGPIO backend, or its name
+    #  The other arguments are those of ButtonDecoder
+    def __init__(self, pin, callback=None, events=(ButtonDecoder.PRESS,), gpio=None, **timing):
+        self.pin = pin
+        self.decoder = ButtonDecoder(callback, events, **timing)
+        self.gpio = dwinGPIO.open_backend(gpio, pins=(pin,))
+        self.gpio.watch(self.pin, self.edgeOccurred)
+        self.decoder.pressed = not self.gpio.input(self.pin)
+
+    def edgeOccurred(self, pin, level, timestamp):
+        self.decoder.edge(not level, timestamp)
+
+    def close(self):
+        self.gpio.unwatch(self.pin)
+
+
+# Pin levels for a turn of detents (negative turns left), steps_per_detent states per detent
+def waveform(detents, steps_per_detent=4):
+    cycle = [(0, 0), (0, 1), (1, 1), (1, 0)]
+    if detents < 0:
+        cycle = [cycle[0]] + cycle[:0:-1]
+    levels = []
+    for i in range(abs(detents) * steps_per_detent):
+        levels.append(cycle[(i + 1) % 4])
+    return levels
+
+
+# Edges per second the decoder handles, against the GPIO callback rate of a fast spin
+def benchmark(edges=200000):
+    levels = waveform(edges // 4) + waveform(-(edges // 4))
+    decoder = QuadratureDecoder()
+    update = decoder.update
+    start = time.perf_counter()
+    for p1, p2 in levels:
+        update(p1, p2)
+    seconds = time.perf_counter() - start
+    print("decoder: %d edges in %.3f s: %.0f edges/s, %.2f us/edge" % (len(levels), seconds, len(levels) / seconds, seconds * 1e6 / len(levels)))
+    # The whole edge path of Encoder, from the backend callback
+    gpio = dwinGPIO.SimulatedGPIO()
+    gpio.levels.update({19: 0, 26: 0})
+    Encoder(19, 26, gpio=gpio)
+    waves = gpio.turn(19, 26, edges // 8) + gpio.turn(19, 26, -(edges // 8))
+    callbacks = gpio.callbacks
+    start = time.perf_counter()
+    for t, pin, level in waves:
+        callbacks[pin](pin, level, t)
+    seconds = time.perf_counter() - start
+    print("encoder: %d edges in %.3f s: %.0f edges/s, %.2f us/edge" % (len(waves), seconds, len(waves) / seconds, seconds * 1e6 / len(waves)))
+
+
+if __name__ == '__main__':
+    benchmark()
+    sys.exit(0)
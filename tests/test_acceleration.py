@@ -0,0 +1,18 @@
+# Value change per detent of the value editors against the turning speed
+from encoder import Acceleration
+
+
+# Slow turns keep min_step, fast ones reach max_step, monotonic in between
+def test_acceleration():
+    accel = Acceleration(1, 10, 4.0, 30.0, 2.0)
+    steps = [accel.step(v) for v in range(0, 40)]
+    assert steps[0] == steps[4] == 1
+    assert steps[30] == steps[39] == 10
+    assert steps == sorted(steps)
+    assert accel.apply(-3, 100.0) == -30
+
+
+def test_acceleration_sign():
+    accel = Acceleration()
+    assert accel.apply(2, 0.0) == 2
+    assert accel.apply(-2, 0.0) == -2
@@ -0,0 +1,50 @@
+# Button events from edge timestamps
+from encoder import ButtonDecoder
+
+
+def decoder(events, **timing):
+    seen = []
+    button = ButtonDecoder(lambda kind, t: seen.append((kind, round(t, 3))), events=events, timer=False, **timing)
+    return button, seen
+
+
+# Bounce is ignored and a quick second click is a double click
+def test_button_clicks():
+    button, seen = decoder(('press', 'release', 'double'))
+    edges = ((1, 0.0), (0, 0.002), (1, 0.004), (0, 0.1), (1, 0.105), (1, 0.2), (0, 0.3), (1, 0.4), (0, 0.5), (1, 1.5))
+    for pressed, t in edges:
+        button.edge(bool(pressed), t)
+    assert [kind for kind, t in seen] == ['press', 'release', 'double', 'release', 'press', 'release', 'press']
+    assert button.bounces == 2
+
+
+def test_button_long_press():
+    button, seen = decoder(('long',), long_press=0.05)
+    button.edge(True, 0.0)
+    button.poll(0.04)
+    assert seen == []
+    button.poll(0.06)
+    button.poll(0.08)
+    button.edge(False, 0.1)
+    assert seen == [('long', 0.05)]
+    # A short press is no long press
+    button.edge(True, 1.0)
+    button.edge(False, 1.01)
+    assert seen == [('long', 0.05)]
+
+
+# Without a poll while held, the release still reports the long press first
+def test_button_long_press_on_release():
+    button, seen = decoder(('long', 'release'), long_press=0.05)
+    button.edge(True, 2.0)
+    button.edge(False, 2.2)
+    assert seen == [('long', 2.05), ('release', 2.2)]
+
+
+# A long press does not start a double click
+def test_button_long_press_no_double():
+    button, seen = decoder(('press', 'long', 'double'), long_press=0.05)
+    button.edge(True, 0.0)
+    button.edge(False, 0.1)
+    button.edge(True, 0.2)
+    assert [kind for kind, t in seen] == ['press', 'long', 'press']
@@ -0,0 +1,78 @@
+# Synthetic waveforms through the encoder decoder
+import random
+
+import pytest
+
+from encoder import QuadratureDecoder, waveform
+
+
+def run(levels, steps_per_detent=4):
+    decoder = QuadratureDecoder(steps_per_detent)
+    return sum(decoder.update(p1, p2) for p1, p2 in levels), decoder
+
+
+@pytest.mark.parametrize('detents', [1, 2, 7, -1, -5])
+def test_clean_turns(detents):
+    assert run(waveform(detents))[0] == detents
+
+
+# Contact bounce on every edge: each new level flickers back once before it settles
+@pytest.mark.parametrize('detents', [3, -3])
+def test_bounce(detents):
+    levels = [(0, 0)]
+    for level in waveform(detents):
+        levels += [level, levels[-1], level]
+    assert run(levels[1:])[0] == detents
+
+
+# A missed intermediate state (11 -> 00) still completes the detent, and is counted
+@pytest.mark.parametrize('levels, detents', [
+    ([(0, 1), (1, 1), (0, 0)], 1),
+    ([(1, 0), (1, 1), (0, 0)], -1),
+])
+def test_missed_state(levels, detents):
+    total, decoder = run(levels)
+    assert total == detents
+    assert decoder.invalid == 1
+
+
+# Half a detent ends at a detent only through a skipped state, and counts the detent
+@pytest.mark.parametrize('steps_per_detent, levels, detents', [
+    (4, [(0, 1), (1, 1), (0, 0)], 1),
+    (4, [(1, 0), (1, 1), (0, 0)], -1),
+    (2, [(1, 1), (0, 0)], 0),
+])
+def test_half_detent_at_rest(steps_per_detent, levels, detents):
+    assert run(levels, steps_per_detent)[0] == detents
+
+
+# Only an encoder with one transition per detent counts the first edge of a turn
+@pytest.mark.parametrize('steps_per_detent, detents', [(1, 1), (2, 0), (4, 0)])
+def test_first_edge(steps_per_detent, detents):
+    assert run(waveform(1, steps_per_detent)[:1], steps_per_detent)[0] == detents
+    assert run(waveform(-1, steps_per_detent)[:1], steps_per_detent)[0] == -detents
+
+
+def test_half_turn_and_back():
+    assert run([(0, 1), (1, 1), (0, 1), (0, 0)])[0] == 0
+
+
+# Encoders with two and one transitions per detent
+@pytest.mark.parametrize('steps_per_detent', [1, 2])
+@pytest.mark.parametrize('detents', [5, -4])
+def test_steps_per_detent(steps_per_detent, detents):
+    assert run(waveform(detents, steps_per_detent), steps_per_detent)[0] == detents
+
+
+# Random walks: every detent passed counts, so the total is the last rest position reached
+@pytest.mark.parametrize('seed', range(50))
+def test_random_walk(seed):
+    rng = random.Random(seed)
+    position = rest = 0
+    levels = []
+    for _ in range(rng.randrange(1, 200)):
+        position += rng.choice((-1, 1))
+        levels.append(waveform(1)[(position - 1) % 4])
+        if position % 4 == 0:
+            rest = position
+    assert run(levels)[0] == rest // 4
@@ -0,0 +1,33 @@
+# Encoder and button driven through the simulated GPIO backend
+import dwinGPIO
+from encoder import Encoder, Button
+
+
+def test_simulated_encoder():
+    gpio = dwinGPIO.SimulatedGPIO()
+    gpio.levels.update({19: 0, 26: 0})
+    values = []
+    encoder = Encoder(19, 26, values.append, gpio=gpio)
+    gpio.play(gpio.turn(19, 26, 5) + gpio.turn(19, 26, -2, start=1.0))
+    assert encoder.getValue() == 3
+    assert values == [1, 2, 3, 4, 5, 4, 3]
+
+
+def test_simulated_button():
+    gpio = dwinGPIO.SimulatedGPIO()
+    events = []
+    Button(13, lambda kind, t: events.append(kind), events=('press', 'release'), gpio=gpio)
+    gpio.play(gpio.press(13, bounce=3))
+    assert events == ['press', 'release']
+
+
+def test_simulated_levels():
+    gpio = dwinGPIO.open_backend('sim', pins=(5, 6))
+    assert gpio.input(5) == gpio.input(6) == 1
+    seen = []
+    gpio.watch(5, lambda pin, level, t: seen.append((pin, level, t)))
+    gpio.set(5, 0, 1.0)
+    gpio.set(5, 0, 2.0)  # No edge
+    gpio.set(6, 0, 3.0)  # Not watched
+    assert seen == [(5, 0, 1.0)]
+    assert gpio.edges == 2